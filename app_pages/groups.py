@@ -0,0 +1,167 @@
+"""各小组页：各小组核心数据指标 (日均对比) 和 Bot 涨跌榜"""
+import streamlit as st
+
+from dashboard import LEADERBOARD_SIZE, REQUIRED_GROUPS, current_data
+from metrics import leaderboard_table
+
+PERF = st.session_state.perf
+refresher, bundle = current_data()
+cube = bundle['cube']
+
+# ====================================================================
+# 🔥 SECTION 7: 各小组核心数据指标 (日均对比 + 线索排名)
+# ====================================================================
+PERF.begin('7. 各小组核心数据指标')
+st.header("🏢 各小组核心数据指标")
+
+# --- 预先计算的 Bot 周度对比 (本周日均 vs 上周日均) 和各小组涨跌榜 (按日均百分比变化) ---
+df_compare = bundle['compare']
+board_consult = bundle['boards']['Consultations']
+board_lead = bundle['boards']['Leads']
+
+def render_leaderboard_table(board, metric):
+    """把涨跌榜渲染为表格 (上升榜、下降榜并排)"""
+    col_up, col_down = st.columns(2)
+    for col, direction, title in ((col_up, 'up', '⬆️ 上升榜'), (col_down, 'down', '🔻 下降榜')):
+        table = leaderboard_table(board, metric, direction)
+        with col:
+            st.caption(title)
+            if table.empty:
+                st.caption("暂无")
+                continue
+            st.dataframe(table, hide_index=True)
+# -----------------------------------
+
+
+present_groups = cube['Group'].dropna().unique()
+groups_to_render = [g for g in REQUIRED_GROUPS if g in present_groups]
+
+if not groups_to_render:
+    st.info("当前数据集中未找到指定小组数据。")
+    st.stop() 
+
+# --- 所有小组的核心指标已一次算完，各 tab 只按组名取行 ---
+group_metrics = bundle['group_metrics']
+
+# 辅助函数: 创建 Delta 文本
+def create_core_metric_delta_text(delta_val, is_avg=True):
+    if is_avg:
+        # 核心指标显示格式: "[+/-]X.X (日均差值)"
+        return f"{delta_val:+.1f} (日均差值)"
+    else:
+        # 核心指标显示格式: "[+/-]X vs 昨日"
+        return f"{delta_val:+d} vs 昨日"
+
+# 辅助函数: 创建 Bot 排名 Delta 文本 (V20.0 格式)
+def create_bot_ranking_delta_text(pct_change, avg_diff):
+    return f"{pct_change:+.1f}% ({avg_diff:+.1f}次/日)"
+
+def render_group_panel(group_name):
+    """渲染单个小组的核心指标和 Bot 涨跌榜"""
+    board_c = board_consult[board_consult['Group'] == group_name]
+    board_l = board_lead[board_lead['Group'] == group_name]
+
+    # --- 1. 标准核心指标 ---
+    metrics = group_metrics[group_name]
+    
+    col_m_c, col_m_l, col_w_c, col_w_l, col_d_c, col_d_l = st.columns(6)
+
+    # 月度咨询
+    with col_m_c: 
+        st.metric("本月总咨询", f"{metrics['tm_c']:,}", 
+            delta=create_core_metric_delta_text(metrics['delta_month_c'], True), delta_color="normal")
+    # 月度线索
+    with col_m_l: 
+        st.metric("本月总线索", f"{metrics['tm_l']:,}", 
+            delta=create_core_metric_delta_text(metrics['delta_month_l'], True), delta_color="normal")
+        
+    # 周咨询
+    with col_w_c: 
+        st.metric("本周咨询", f"{metrics['tw_c']:,}", 
+            delta=create_core_metric_delta_text(metrics['delta_week_c'], True), delta_color="normal")
+    # 周线索
+    with col_w_l: 
+        st.metric("本周线索", f"{metrics['tw_l']:,}", 
+            delta=create_core_metric_delta_text(metrics['delta_week_l'], True), delta_color="normal")
+        
+    # 今日咨询
+    with col_d_c: 
+        st.metric("今日咨询", f"{metrics['t_c']:,}", 
+            delta=create_core_metric_delta_text(metrics['delta_day_c'], False), delta_color="normal")
+    # 今日线索
+    with col_d_l: 
+        st.metric("今日线索", f"{metrics['t_l']:,}", 
+            delta=create_core_metric_delta_text(metrics['delta_day_l'], False), delta_color="normal")
+
+    st.markdown("---")
+    st.markdown("##### 📈 本周日均涨跌排名 (Bot)")
+    st.caption("ℹ️ **对比周期：**本周日均 vs 上周日均 (已进行时间标准化)")
+
+    
+    # --- 2. 咨询涨跌排名 (Bot) ---
+    st.markdown("<div style='border: 1px solid #ddd; padding: 10px; border-radius: 5px; margin-bottom: 15px;'>", unsafe_allow_html=True)
+    st.markdown("###### 🗣️ 咨询数变化")
+    max_down_c = board_c[(board_c['Direction'] == 'down') & (board_c['Rank'] == 1)]
+    max_up_c = board_c[(board_c['Direction'] == 'up') & (board_c['Rank'] == 1)]
+    
+    col_c_down, col_c_up = st.columns(2)
+
+    with col_c_down:
+        if not max_down_c.empty:
+            down_data = max_down_c.iloc[0]
+            delta_text = create_bot_ranking_delta_text(down_data['Pct_Change_Consultations'], down_data['Diff_Avg_Consultations'])
+            st.metric(label="🔻 日均下降最多 Bot", value=f"Bot: {down_data['BotNoteName']}", delta=delta_text, delta_color="normal")
+        else:
+            st.info("日均无咨询下降的 Bot")
+    
+    with col_c_up:
+        if not max_up_c.empty:
+            up_data = max_up_c.iloc[0]
+            delta_text = create_bot_ranking_delta_text(up_data['Pct_Change_Consultations'], up_data['Diff_Avg_Consultations'])
+            st.metric(label="⬆️ 日均上升最多 Bot", value=f"Bot: {up_data['BotNoteName']}", delta=delta_text, delta_color="normal")
+        else:
+            st.info("日均无咨询上升的 Bot")
+    with st.expander(f"📋 咨询涨跌榜 (前 {LEADERBOARD_SIZE} 名)"):
+        render_leaderboard_table(board_c, 'Consultations')
+    st.markdown("</div>", unsafe_allow_html=True) 
+
+    
+    # --- 3. 线索涨跌排名 (Bot) ---
+    st.markdown("<div style='border: 1px solid #ddd; padding: 10px; border-radius: 5px;'>", unsafe_allow_html=True)
+    st.markdown("###### 🔗 线索数变化")
+    max_down_l = board_l[(board_l['Direction'] == 'down') & (board_l['Rank'] == 1)]
+    max_up_l = board_l[(board_l['Direction'] == 'up') & (board_l['Rank'] == 1)]
+    
+    col_l_down, col_l_up = st.columns(2)
+
+    with col_l_down:
+        if not max_down_l.empty:
+            down_data = max_down_l.iloc[0]
+            delta_text = create_bot_ranking_delta_text(down_data['Pct_Change_Leads'], down_data['Diff_Avg_Leads'])
+            st.metric(label="🔻 日均下降最多 Bot", value=f"Bot: {down_data['BotNoteName']}", delta=delta_text, delta_color="normal")
+        else:
+            st.info("日均无线索下降的 Bot")
+    
+    with col_l_up:
+        if not max_up_l.empty:
+            up_data = max_up_l.iloc[0]
+            delta_text = create_bot_ranking_delta_text(up_data['Pct_Change_Leads'], up_data['Diff_Avg_Leads'])
+            st.metric(label="⬆️ 日均上升最多 Bot", value=f"Bot: {up_data['BotNoteName']}", delta=delta_text, delta_color="normal")
+        else:
+            st.info("日均无线索上升的 Bot")
+    with st.expander(f"📋 线索涨跌榜 (前 {LEADERBOARD_SIZE} 名)"):
+        render_leaderboard_table(board_l, 'Leads')
+    st.markdown("</div>", unsafe_allow_html=True)
+
+# 小组面板放在 fragment 中：切换 tab 只重跑这一块，并且只渲染当前选中的小组
+@st.fragment
+def render_group_panels():
+    PERF.begin('7. 小组 tab')
+    tabs = st.tabs(groups_to_render, key='group_tab', on_change='rerun')
+    for tab, group_name in zip(tabs, groups_to_render):
+        if tab.open:
+            with tab:
+                render_group_panel(group_name)
+    PERF.end()
+
+render_group_panels()
@@ -0,0 +1,90 @@
+"""总览页：核心数据指标、今日机器人表现、当月总趋势"""
+import streamlit as st
+
+from dashboard import CHART_MAX_POINTS, current_data, figure_json, render_figure
+from metrics import bots_on_day, daily_trend, overview_metrics
+
+PERF = st.session_state.perf
+refresher, bundle = current_data()
+cube = bundle['cube']
+# 全局前缀和表，任意日期区间的合计都是常数级查询
+range_sums = bundle['range_sums']
+PERIODS = bundle['periods']
+CURRENT_MONTH_START, TODAY = PERIODS['this_month']
+yesterday, _ = PERIODS['yesterday']
+
+# ⚡️ 先输出只依赖前缀和表的 KPI 卡片，再构建图表：浏览器先看到指标，
+# 图表构建 (charts / plotly) 放在后面，且只在图表缓存未命中时才导入
+# --- 4. 核心数据指标 (总览) ---
+PERF.begin('4. 核心数据指标')
+st.header("📊 核心数据指标 (总览)")
+
+# 计算各周期数据 (月度、周度为日均差值，日度为今日对比昨日)
+ov = overview_metrics(range_sums, PERIODS)
+
+y_str = yesterday.strftime('%m-%d')
+t_str = TODAY.strftime('%m-%d')
+
+# --- 1. 月度概览 ---
+st.markdown("##### 📅 月度概览")
+row1_1, row1_2, row1_3, row1_4 = st.columns(4)
+with row1_1: st.metric("上月总咨询数", f"{ov['lm_c']:,}", f"日均 {ov['lm_avg_c']:.1f}", delta_color="off")
+with row1_2: st.metric("上月总线索数", f"{ov['lm_l']:,}", f"日均 {ov['lm_avg_l']:.1f}", delta_color="off")
+# 格式化字符串以确保颜色正确：f"{val:+.1f} (文本)"
+with row1_3: st.metric("本月总咨询数", f"{ov['tm_c']:,}", f"{ov['diff_month_c']:+.1f} (日均差值)", delta_color="normal")
+with row1_4: st.metric("本月总线索数", f"{ov['tm_l']:,}", f"{ov['diff_month_l']:+.1f} (日均差值)", delta_color="normal")
+
+# --- 2. 周度概览 (新增日均对比) ---
+st.markdown("##### 🗓️ 周度概览 (周一到周日)")
+row2_1, row2_2, row2_3, row2_4 = st.columns(4)
+with row2_1: st.metric("上周咨询数", f"{ov['lw_c']:,}", f"日均 {ov['lw_avg_c']:.1f}", delta_color="off")
+with row2_2: st.metric("上周线索数", f"{ov['lw_l']:,}", f"日均 {ov['lw_avg_l']:.1f}", delta_color="off")
+with row2_3: st.metric("本周咨询数", f"{ov['tw_c']:,}", f"{ov['diff_week_c']:+.1f} (日均差值)", delta_color="normal")
+with row2_4: st.metric("本周线索数", f"{ov['tw_l']:,}", f"{ov['diff_week_l']:+.1f} (日均差值)", delta_color="normal")
+
+# --- 3. 日度概览 ---
+st.markdown("##### ⏰ 日度概览")
+row3_1, row3_2, row3_3, row3_4 = st.columns(4)
+with row3_1: st.metric(f"昨日咨询数 ({y_str})", f"{ov['y_c']:,}")
+with row3_2: st.metric(f"昨日线索数 ({y_str})", f"{ov['y_l']:,}")
+with row3_3: st.metric(f"今日咨询数 ({t_str})", f"{ov['t_c']:,}", f"{ov['pct_day_c']:.1f}% vs 昨日", delta_color="normal")
+with row3_4: st.metric(f"今日线索数 ({t_str})", f"{ov['t_l']:,}", f"{ov['pct_day_l']:.1f}% vs 昨日", delta_color="normal")
+
+st.markdown("---")
+
+
+# --- 5. 今日机器人数据柱状图 ---
+PERF.begin('5. 今日机器人表现')
+st.header("🤖 今日机器人表现") 
+
+df_today_filtered = bots_on_day(cube, TODAY)
+PERF.add_rows(len(df_today_filtered))
+
+if not df_today_filtered.empty:
+    def build_today_figure():
+        from charts import build_today_bar_figure
+        return build_today_bar_figure(df_today_filtered, TODAY)
+
+    fig6_json = figure_json(('today_bar', TODAY), build_today_figure)
+    render_figure(fig6_json)
+else:
+    st.info(f"今日 ({str(TODAY)}) 暂无机器人咨询数据。")
+
+st.markdown("---")
+
+# --- 6. 当月总趋势折线图 ---
+PERF.begin('6. 当月总趋势')
+st.header("📈 当月总趋势") 
+
+df_month = daily_trend(cube, CURRENT_MONTH_START)
+PERF.add_rows(len(df_month))
+
+if not df_month.empty:
+    def build_month_figure():
+        from charts import build_month_trend_figure
+        return build_month_trend_figure(df_month, CURRENT_MONTH_START, max_points=CHART_MAX_POINTS)
+
+    fig7_json = figure_json(('month_trend', CURRENT_MONTH_START, CHART_MAX_POINTS), build_month_figure)
+    render_figure(fig7_json)
+else:
+    st.info("当月暂无数据。")
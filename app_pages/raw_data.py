@@ -0,0 +1,77 @@
+"""源数据页：按筛选条件分页查看、排序、搜索和导出原始行"""
+import streamlit as st
+
+from dashboard import cached_query, current_data, normalize_filters, query_source_rows, render_filter_form
+from source_view import export_file, page_count, page_slice, view_positions
+
+PERF = st.session_state.perf
+refresher, bundle = current_data()
+DATA_VERSION = bundle['version']
+
+# --- 源数据分页查看：排序 / 搜索结果 (行位置) 走查询缓存，每次只把当前页发给浏览器 ---
+SOURCE_PAGE_SIZES = (50, 100, 500)
+EXPORT_CHUNK_ROWS = 50_000
+
+def render_source_view(rows, filters):
+    columns = list(rows.columns)
+    col_sort, col_order, col_search_col, col_search = st.columns(4)
+    with col_sort:
+        sort_column = st.selectbox("排序列", columns, index=columns.index('Date'), key='src_sort_column')
+    with col_order:
+        ascending = st.radio("顺序", ("升序", "降序"), horizontal=True, key='src_sort_order') == "升序"
+    with col_search_col:
+        search_column = st.selectbox("搜索列", columns, index=columns.index('BotNoteName'), key='src_search_column')
+    with col_search:
+        search_text = st.text_input("搜索内容", key='src_search_text').strip()
+
+    view_key = (DATA_VERSION, 'source_view', normalize_filters(filters), sort_column, ascending, search_column, search_text)
+    positions = cached_query(
+        view_key, lambda: view_positions(rows, sort_column, ascending, search_column, search_text)
+    )
+    PERF.add_rows(len(positions))
+
+    col_size, col_page, col_total = st.columns([1, 1, 2])
+    with col_size:
+        page_size = st.selectbox("每页行数", SOURCE_PAGE_SIZES, key='src_page_size')
+    pages = page_count(len(positions), page_size)
+    if st.session_state.get('src_page', 1) > pages:
+        st.session_state.src_page = 1
+    with col_page:
+        page = st.number_input("页码", min_value=1, max_value=pages, value=1, step=1, key='src_page')
+    with col_total:
+        st.caption(f"共 {len(positions):,} 行 / {pages} 页")
+
+    page_rows = page_slice(rows, positions, page, page_size)
+    try:
+        st.dataframe(page_rows, use_container_width=True)
+    except:
+        st.dataframe(page_rows, width='stretch')
+
+    # 点击时才在后台线程里分块生成文件
+    col_csv, col_parquet = st.columns(2)
+    with col_csv:
+        st.download_button("⬇️ 下载 CSV", data=lambda: export_file(rows, positions, 'csv', EXPORT_CHUNK_ROWS),
+                           file_name='source_data.csv', mime='text/csv', on_click='ignore', key='src_download_csv')
+    with col_parquet:
+        st.download_button("⬇️ 下载 Parquet", data=lambda: export_file(rows, positions, 'parquet', EXPORT_CHUNK_ROWS),
+                           file_name='source_data.parquet', mime='application/octet-stream', on_click='ignore', key='src_download_parquet')
+
+# 筛选和源数据放在 fragment 中：翻页、排序、搜索只重跑这一块
+@st.fragment
+def render_source_data():
+    PERF.begin('8-9. 源数据筛选')
+    st.header("🗂️ 查看源数据")
+
+    current_product_filters = render_filter_form()
+    df_product_filtered = query_source_rows(current_product_filters)
+    PERF.add_rows(len(df_product_filtered))
+
+    # --- 11. 查看源数据 ---
+    PERF.begin('11. 查看源数据')
+    st.markdown("---")
+    notename_display = f"机器人: {len(current_product_filters['notename'])} 个"
+    st.caption(f"筛选区间: {current_product_filters['date_option']} / {notename_display}")
+    render_source_view(df_product_filtered, current_product_filters)
+    PERF.end()
+
+render_source_data()
@@ -0,0 +1,164 @@
+"""趋势分析页：按时间范围 / 机器人筛选的聚合趋势，以及产品 → 小组 → Bot 下钻"""
+import pandas as pd
+import streamlit as st
+
+from dashboard import (
+    CHART_MAX_POINTS, current_data, figure_json, normalize_filters, query_trend, render_figure, render_filter_form,
+)
+from metrics import HIERARCHY_LEVELS, PERIOD_PAIRS, calc_pct, compare_children
+
+PERF = st.session_state.perf
+refresher, bundle = current_data()
+PERIODS = bundle['periods']
+all_notenames = bundle['notenames']
+
+# ====================================================================
+# --- SECTION 8: 趋势分析筛选 ---
+# ====================================================================
+# 趋势分析 (8-10) 放在 fragment 中：提交筛选只重跑这一块，不会重跑下方的下钻
+@st.fragment
+def render_trend_analysis():
+    PERF.begin('8-9. 趋势分析筛选')
+    st.header("📊 趋势分析筛选")
+
+    current_product_filters = render_filter_form()
+    # 趋势页只需要每日聚合，原始行在源数据页才读取
+    df_trend_data = query_trend(current_product_filters)
+
+    PERF.add_rows(len(df_trend_data))
+
+    # --- 10. 聚合趋势分析 ---
+    PERF.begin('10. 聚合趋势分析')
+
+    st.markdown("---")
+    st.subheader(f"📊 聚合趋势分析 (时间: {current_product_filters['start_date'].strftime('%m.%d')} - {current_product_filters['end_date'].strftime('%m.%d')})")
+
+    if not current_product_filters['notename']:
+        st.warning("请在上方【机器人备注名】中选择至少一个机器人进行趋势分析。")
+    elif df_trend_data.empty:
+        st.info("当前筛选条件下没有找到任何数据。请调整筛选条件。")
+    else:
+        current_notename_list = current_product_filters['notename']
+        title_suffix = ""
+        if len(current_notename_list) == len(all_notenames):
+            title_suffix = " (所有机器人聚合)"
+        elif len(current_notename_list) == 1:
+            title_suffix = f" (机器人: {current_notename_list[0]})"
+        else:
+            title_suffix = f" (聚合 {len(current_notename_list)} 个机器人)"
+
+        def build_fig9():
+            from charts import build_trend_figure
+            return build_trend_figure(
+                df_trend_data['Date'], {'咨询': df_trend_data['Consultations'], '线索': df_trend_data['Leads']},
+                title="趋势分析" + title_suffix,
+                max_points=CHART_MAX_POINTS,
+            )
+
+        spec = ('trend', normalize_filters(current_product_filters), title_suffix, CHART_MAX_POINTS)
+        render_figure(figure_json(spec, build_fig9))
+
+    PERF.end()
+
+render_trend_analysis()
+
+# ====================================================================
+# --- SECTION 12: 产品 → 小组 → Bot 下钻 ---
+# ====================================================================
+# ⚡️ 性能优化：各层节点的日汇总在后台随数据版本一次建好 (见 metrics.HierarchyRollup)，
+# 在层级之间切换只读取节点合计，不对原始数据重新分组
+hierarchy = bundle['hierarchy']
+DRILL_LEVEL_NAMES = ['产品', '小组', 'Bot']
+DRILL_PERIODS = {'本月 vs 上月': 'month', '本周 vs 上周': 'week', '今日 vs 昨日': 'day'}
+
+if 'drill_path' not in st.session_state:
+    st.session_state.drill_path = ()
+
+def node_label(path):
+    if not path:
+        return "全部"
+    if hierarchy.is_leaf(path):
+        return f"{path[2]} ({path[3]})"
+    return path[-1]
+
+def drill_to(path):
+    st.session_state.drill_path = path
+
+def drill_into(children):
+    """下钻选择框的回调：进入选中的子节点 (children 为 {显示名: 节点})"""
+    label = st.session_state.drill_child
+    if label is not None:
+        st.session_state.drill_path = children[label]
+        st.session_state.drill_child = None
+
+# 下钻放在 fragment 中：切换层级只重跑这一块
+@st.fragment
+def render_drill_down():
+    PERF.begin('12. 分层下钻')
+    st.markdown("---")
+    st.header("🧭 产品 → 小组 → Bot 下钻")
+
+    path = st.session_state.drill_path
+    if hierarchy.level(path) is None:  # 数据更新后节点可能已不存在
+        path = st.session_state.drill_path = ()
+    level = hierarchy.level(path)
+
+    period_label = st.radio("对比周期", list(DRILL_PERIODS), horizontal=True, key='drill_period')
+    current, previous = (PERIODS[name] for name in PERIOD_PAIRS[DRILL_PERIODS[period_label]])
+    current_name, previous_name = period_label.split(' vs ')
+
+    # 路径：点击上层节点返回
+    ancestors = [path[:len(cols)] for cols in HIERARCHY_LEVELS if len(cols) <= len(path)]
+    for col, node in zip(st.columns(len(HIERARCHY_LEVELS)), ancestors):
+        with col:
+            st.button(("📍 " if node == path else "") + node_label(node), key=f'drill_crumb_{len(node)}',
+                      on_click=drill_to, args=(node,), disabled=node == path)
+
+    curr_total, prev_total = hierarchy.total(path, *current), hierarchy.total(path, *previous)
+    curr_days, prev_days = (current[1] - current[0]).days + 1, (previous[1] - previous[0]).days + 1
+    metric_cols = st.columns(2)
+    for i, (col, name) in enumerate(zip(metric_cols, ("咨询数", "线索数"))):
+        pct = calc_pct(curr_total[i] / curr_days, prev_total[i] / prev_days)
+        with col:
+            st.metric(f"{node_label(path)} · {current_name}{name}", f"{int(curr_total[i]):,}",
+                      f"日均 {pct:+.1f}% vs {previous_name} ({int(prev_total[i]):,})", delta_color="normal")
+
+    if hierarchy.is_leaf(path):
+        st.caption("已到 Bot 层级，点击上方路径返回。")
+    else:
+        child_name = DRILL_LEVEL_NAMES[level]
+        compare = compare_children(hierarchy, path, current, previous)
+        PERF.add_rows(len(compare))
+        if compare.empty:
+            st.info(f"{current_name}和{previous_name}都没有数据。")
+        else:
+            compare = compare.sort_values('Curr_Consultations', ascending=False, kind='stable')
+            children = {node_label(child): child
+                        for child in compare[HIERARCHY_LEVELS[level + 1]].itertuples(index=False, name=None)}
+            table = pd.DataFrame({
+                child_name: list(children),
+                f'{current_name}咨询': compare['Curr_Consultations'].astype(int).to_numpy(),
+                f'{previous_name}咨询': compare['Prev_Consultations'].astype(int).to_numpy(),
+                '咨询日均变化 (%)': compare['Pct_Change_Consultations'].round(1).to_numpy(),
+                f'{current_name}线索': compare['Curr_Leads'].astype(int).to_numpy(),
+                f'{previous_name}线索': compare['Prev_Leads'].astype(int).to_numpy(),
+                '线索日均变化 (%)': compare['Pct_Change_Leads'].round(1).to_numpy(),
+            })
+            st.dataframe(table, hide_index=True)
+            st.selectbox(f"下钻到{child_name}", list(children), index=None, placeholder=f"选择一个{child_name}",
+                         key='drill_child', on_change=drill_into, args=(children,))
+
+    daily = hierarchy.daily(path, *current)
+    if len(daily) > 1:
+        def build_drill_figure():
+            from charts import build_trend_figure
+            return build_trend_figure(
+                daily['Date'], {'咨询': daily['Consultations'], '线索': daily['Leads']},
+                title=f"{node_label(path)} · {current_name}每日趋势",
+                max_points=CHART_MAX_POINTS,
+            )
+
+        render_figure(figure_json(('drill_trend', path, current, period_label, CHART_MAX_POINTS), build_drill_figure))
+    PERF.end()
+
+render_drill_down()
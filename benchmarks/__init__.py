@@ -0,0 +1 @@
+"""看板数据处理的性能基准 (python -m benchmarks.run_benchmarks)"""
@@ -0,0 +1,179 @@
+"""冷启动基准：新进程中打开看板首页，记录首个 KPI 卡片和首个图表出现的时间
+
+用法 (在仓库根目录)：
+    python -m benchmarks.cold_start                                  # 100k 行，3 个进程
+    python -m benchmarks.cold_start --rows 1m --repeat 5 --json after.json --baseline before.json
+
+合成数据写成本地 CSV (BOT_DASHBOARD_SOURCE_FILES)，不需要 Secrets 和网络。每次测量都启动
+一个新的 Python 进程 (和部署后第一次访问一样，没有任何已导入的模块和 st.cache_resource)，
+在其中用 AppTest 打开首页两次：
+    冷会话：进程内第一个会话，包括导入页面依赖、解析 CSV 和构建派生数据
+    热会话：随后的新会话，数据包已在进程内
+时间均从脚本开始执行算起 (不含 AppTest 自身的准备开销)，取 --repeat 个进程的中位数；
+import streamlit (服务器进程启动时的开销) 单独列出。
+指定 --baseline 时并列显示之前 --json 写出的结果。
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+# 首个 KPI 出现时是否已导入，用来确认重依赖确实被推迟了
+WATCHED_MODULES = ('gspread', 'charts')
+COLUMNS = (
+    ('import_streamlit_s', 'import streamlit'),
+    ('cold_first_kpi_s', '冷会话首个 KPI'),
+    ('cold_first_chart_s', '冷会话首个图表'),
+    ('cold_run_s', '冷会话完成'),
+    ('warm_first_kpi_s', '热会话首个 KPI'),
+    ('warm_run_s', '热会话完成'),
+)
+
+
+def measure_session(app_test_cls, marks):
+    """新建一个会话打开首页，返回 (首个 KPI, 首个图表, 运行完成) 距脚本开始执行的秒数"""
+    marks.clear()
+    at = app_test_cls.from_file(APP_PATH, default_timeout=600)
+    at.run()
+    finished = time.perf_counter()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    since = lambda name: marks[name] - marks['script'] if name in marks else None
+    return since('metric'), since('plotly_chart'), finished - marks['script'], marks.get('modules', [])
+
+
+def child_main():
+    """子进程：测量一次冷启动，结果以一行 JSON 写到 stdout"""
+    started = time.perf_counter()
+    import streamlit as st
+    import_streamlit = time.perf_counter() - started
+
+    from streamlit import config
+    from streamlit import logger as streamlit_logger
+    from streamlit.delta_generator import DeltaGenerator
+    from streamlit.runtime.scriptrunner import script_runner
+    from streamlit.testing.v1 import AppTest
+    config.set_option('logger.level', 'error')
+    streamlit_logger.set_log_level('error')
+
+    marks = {}
+
+    def first_call(name, fn):
+        def wrapper(*args, **kwargs):
+            if name not in marks:
+                marks[name] = time.perf_counter()
+                if name == 'metric':
+                    marks['modules'] = [m for m in WATCHED_MODULES if m in sys.modules]
+            return fn(*args, **kwargs)
+        return wrapper
+
+    # 脚本开始执行的时间：ScriptRunner 每次运行都通过它执行脚本
+    exec_script = script_runner.exec_func_with_error_handling
+
+    def timed_exec(*args, **kwargs):
+        marks.setdefault('script', time.perf_counter())
+        return exec_script(*args, **kwargs)
+
+    script_runner.exec_func_with_error_handling = timed_exec
+
+    # st.metric 是绑定到主容器的方法，列 / 容器中的调用走 DeltaGenerator，两处都替换
+    for name in ('metric', 'plotly_chart'):
+        setattr(DeltaGenerator, name, first_call(name, getattr(DeltaGenerator, name)))
+        setattr(st, name, first_call(name, getattr(st, name)))
+
+    cold_kpi, cold_chart, cold_run, modules = measure_session(AppTest, marks)
+    warm_kpi, _, warm_run, _ = measure_session(AppTest, marks)
+    print(json.dumps({
+        'import_streamlit_s': import_streamlit,
+        'cold_first_kpi_s': cold_kpi,
+        'cold_first_chart_s': cold_chart,
+        'cold_run_s': cold_run,
+        'warm_first_kpi_s': warm_kpi,
+        'warm_run_s': warm_run,
+        'modules_at_first_kpi': modules,
+    }))
+
+
+def run_child(source_files, snapshot_dir):
+    env = dict(os.environ, BOT_DASHBOARD_SOURCE_FILES=source_files, BOT_DASHBOARD_SNAPSHOT_DIR=snapshot_dir)
+    env.pop('BOT_DASHBOARD_PUBLISH_DIR', None)
+    result = subprocess.run([sys.executable, '-m', 'benchmarks.cold_start', '--child'], env=env,
+                            cwd=os.path.dirname(APP_PATH), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def median_result(runs):
+    summary = {}
+    for key, _ in COLUMNS:
+        values = [run[key] for run in runs if run[key] is not None]
+        summary[key] = statistics.median(values) if values else None
+    summary['modules_at_first_kpi'] = runs[-1]['modules_at_first_kpi']
+    return summary
+
+
+def run_cold_starts(n_rows, repeat):
+    from streamlit import logger as streamlit_logger
+
+    from benchmarks.load_test import dashboard_groups
+    from benchmarks.synthetic import make_raw_frame
+    # 父进程导入 dashboard 只为取小组名，没有 Streamlit 运行时的提示不需要显示
+    streamlit_logger.set_log_level('error')
+
+    work_dir = tempfile.mkdtemp(prefix='bot-dashboard-cold-')
+    try:
+        source_path = os.path.join(work_dir, 'export.csv')
+        make_raw_frame(n_rows, group_names=dashboard_groups()).to_csv(source_path, index=False)
+        runs = [run_child(source_path, os.path.join(work_dir, f'snapshot-{i}')) for i in range(repeat)]
+        return median_result(runs)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def format_seconds(value):
+    return '-' if value is None else f'{value * 1000:.0f}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='看板冷启动和首个 KPI 出现时间基准')
+    parser.add_argument('--rows', default='100k', help='合成数据行数，可选 10k,100k,1m,10m')
+    parser.add_argument('--repeat', type=int, default=3, help='每种场景启动的进程数 (取中位数)')
+    parser.add_argument('--json', help='把结果写入该 JSON 文件')
+    parser.add_argument('--baseline', help='与之前 --json 写出的结果并列显示')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child_main()
+        return 0
+
+    from benchmarks.run_benchmarks import SIZES
+    results = run_cold_starts(SIZES[args.rows.strip().lower()], args.repeat)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print(f'{args.rows} 行合成数据，{args.repeat} 个进程的中位数 (ms，从脚本开始执行算起)；'
+          f'首个 KPI 出现时已导入 {results["modules_at_first_kpi"] or "无"}')
+    for key, title in COLUMNS:
+        line = f'  {format_seconds(results[key]):>7}'
+        if baseline is not None:
+            line += f'  (基准 {format_seconds(baseline.get(key)):>6})'
+        print(f'{line}  {title}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""多会话并发压测：在一个进程内用 Streamlit AppTest 同时驱动多个看板会话
+
+用法 (在仓库根目录)：
+    python -m benchmarks.load_test                                  # 1 / 2 / 4 / 8 个会话，100k 行
+    python -m benchmarks.load_test --sessions 1,4,16 --rows 1m --rounds 3 --json load.json
+
+Google Sheets 换成内存中的假表格 (数据来自 benchmarks.synthetic)，快照和冷存档写到临时
+目录，不需要 Secrets 和网络。先单独跑一次页面完成首次加载 (冷启动)，之后每种会话数下，
+各会话在各自线程中同时：打开总览页，到各小组页依次切换全部小组 tab，再到趋势分析页用
+不同的时间范围 / 机器人提交筛选表单，重复 --rounds 轮。和 Streamlit 服务器一样，所有会话共用一个进程和
+st.cache_resource (后台刷新器、查询缓存)。
+
+每种会话数报告 rerun 耗时 p50 / p95 / 最大值、吞吐、进程 CPU 时间 (及平均占用核数)
+和 RSS。p95 随会话数明显上涨、而 CPU 占用核数已接近 1 时，说明 rerun 开始排队，
+需要增加副本。
+"""
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import gspread
+import numpy as np
+import streamlit as st
+from streamlit import config
+from streamlit import logger as streamlit_logger
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner
+
+from benchmarks.run_benchmarks import SIZES
+from benchmarks.synthetic import make_raw_frame
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+DEFAULT_SESSIONS = '1,2,4,8'
+TREND_OPTIONS = ('本月', '本周', '近7天', '近30天')
+OVERVIEW_PAGE = 'app_pages/overview.py'
+GROUPS_PAGE = 'app_pages/groups.py'
+TREND_PAGE = 'app_pages/trend.py'
+SUBMIT_LABEL = '🔍 查询趋势 / 更新数据源'
+
+
+class StubSpreadsheet:
+    """只有一个工作表的内存表格，实现 GoogleSheetsSource 用到的 gspread 接口"""
+
+    def __init__(self, values, title='Sheet1'):
+        self.values = values
+        self.title = title
+
+    def worksheets(self):
+        return [self]
+
+    def _get(self, a1):
+        cells = a1.rsplit('!', 1)[1] if '!' in a1 else None
+        if cells is None:
+            return self.values
+        m = re.match(r'[A-Z]*(\d+):[A-Z]*(\d*)$', cells)
+        first = int(m.group(1))
+        last = int(m.group(2)) if m.group(2) else len(self.values)
+        return self.values[first - 1:last]
+
+    def values_batch_get(self, ranges, **kwargs):
+        return {'valueRanges': [{'range': a1, 'values': self._get(a1)} for a1 in ranges]}
+
+    def values_get(self, a1, **kwargs):
+        return {'values': self._get(a1)}
+
+
+class StubClient:
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+
+    def open_by_key(self, key):
+        return self.spreadsheet
+
+
+def dashboard_groups():
+    """dashboard.py 中的 REQUIRED_GROUPS：合成数据使用这些小组名，小组 tab 才会渲染
+
+    dashboard 在导入时读取环境变量中的配置，所以在设好环境变量之后才导入。
+    """
+    from dashboard import REQUIRED_GROUPS
+    return list(REQUIRED_GROUPS)
+
+
+def install_stub_source(n_rows):
+    """把 gspread 客户端换成返回合成数据的假表格，并配置好 app.py 需要的 Secrets"""
+    os.environ.pop('BOT_DASHBOARD_SOURCE_FILES', None)
+    os.environ['BOT_DASHBOARD_SNAPSHOT_DIR'] = tempfile.mkdtemp(prefix='bot-dashboard-load-')
+    raw = make_raw_frame(n_rows, group_names=dashboard_groups())
+    spreadsheet = StubSpreadsheet([list(raw.columns)] + raw.to_numpy().tolist())
+    gspread.service_account_from_dict = lambda creds, **kwargs: StubClient(spreadsheet)
+    # AppTest 只在给了 secrets 时才逐次替换全局 st.secrets；这里一次性设好，各会话都不再替换
+    secrets = st.runtime.secrets.Secrets()
+    secrets._secrets = {'gcp_service_account': {'type': 'service_account'}}
+    st.secrets = secrets
+    return raw['机器人备注名'].drop_duplicates().tolist()
+
+
+def allow_concurrent_runs():
+    """让多个 AppTest 可以在不同线程中同时 run
+
+    AppTest 每次 run 都会设置、结束时又清空全局 Runtime 单例，并临时打开 global.appTest
+    配置；多个会话同时 run 时，先结束的会话会把它们撤销。这里让 Runtime.instance() 在
+    单例被清空后继续返回最近一次设置的运行时，global.appTest 一直保持打开。AppTest 还会
+    每次 run 新建 ScriptCache、重新编译 app.py (Python 3.11 在多个线程中同时 ast.parse
+    会出错)，这里和 Streamlit 服务器一样让所有会话共用一份编译结果。
+    """
+    config.set_option('global.appTest', True)
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    latest = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            latest['runtime'] = cls._instance
+        if 'runtime' not in latest:
+            raise RuntimeError("Runtime hasn't been created!")
+        return latest['runtime']
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or 'runtime' in latest)
+
+
+def timed_run(at, latencies):
+    started = time.perf_counter()
+    at.run()
+    latencies.append(time.perf_counter() - started)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+
+def run_session(seed, notenames, rounds, latencies, errors):
+    """一个会话：打开总览页，切换全部小组 tab，提交趋势分析表单，重复 rounds 轮"""
+    rng = random.Random(seed)
+    groups = dashboard_groups()
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=600)
+        for _ in range(rounds):
+            timed_run(at, latencies)
+            at.switch_page(GROUPS_PAGE)
+            timed_run(at, latencies)
+            for group in groups:
+                at.session_state['group_tab'] = group
+                timed_run(at, latencies)
+            at.switch_page(TREND_PAGE)
+            timed_run(at, latencies)
+            at.selectbox(key='form_date_option').select(rng.choice(TREND_OPTIONS))
+            at.multiselect(key='form_notename').set_value(rng.sample(notenames, rng.randint(1, 5)))
+            next(button for button in at.button if button.label == SUBMIT_LABEL).click()
+            timed_run(at, latencies)
+            at.switch_page(OVERVIEW_PAGE)
+    except Exception as e:
+        errors.append(repr(e))
+
+
+def process_usage():
+    """(进程 CPU 秒数, 当前 RSS 字节数, 峰值 RSS 字节数)"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss 在 Linux 上以 KB 为单位，在 macOS 上以字节为单位
+    peak = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    rss = peak
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        pass
+    return usage.ru_utime + usage.ru_stime, rss, peak
+
+
+def run_load(n_sessions, notenames, rounds):
+    """n_sessions 个会话同时跑完，返回 rerun 耗时分位数、吞吐、CPU 和内存统计"""
+    latencies, errors = [], []
+    threads = [threading.Thread(target=run_session, args=(i, notenames, rounds, latencies, errors))
+               for i in range(n_sessions)]
+    cpu_before, _, _ = process_usage()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    cpu_after, rss, peak = process_usage()
+
+    seconds = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        'sessions': n_sessions,
+        'reruns': len(latencies),
+        'errors': errors,
+        'p50_ms': float(np.percentile(seconds, 50)) * 1000,
+        'p95_ms': float(np.percentile(seconds, 95)) * 1000,
+        'max_ms': float(seconds.max()) * 1000,
+        'reruns_per_s': len(latencies) / wall,
+        'wall_s': wall,
+        'cpu_s': cpu_after - cpu_before,
+        'cpu_cores': (cpu_after - cpu_before) / wall,
+        'rss_bytes': rss,
+        'peak_rss_bytes': peak,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='看板多会话并发压测')
+    parser.add_argument('--sessions', default=DEFAULT_SESSIONS, help='逗号分隔的并发会话数')
+    parser.add_argument('--rows', default='100k', help=f'合成数据行数，可选 {",".join(SIZES)}')
+    parser.add_argument('--rounds', type=int, default=2, help='每个会话点击完整流程的轮数')
+    parser.add_argument('--json', help='把结果写入该 JSON 文件')
+    args = parser.parse_args(argv)
+
+    # 每次 rerun 都会打印的 missing ScriptRunContext (AppTest 在脚本线程之外操作会话状态) 和
+    # use_container_width 弃用提示会淹没结果，压测时只保留错误日志
+    config.set_option('logger.level', 'error')
+    streamlit_logger.set_log_level('error')
+    notenames = install_stub_source(SIZES[args.rows.strip().lower()])
+    allow_concurrent_runs()
+
+    # 首次运行完成数据加载和派生数据构建 (st.cache_resource)，之后各会话都直接复用
+    cold, errors = [], []
+    run_session(-1, notenames, 1, cold, errors)
+    if errors:
+        print(f'首次运行失败：{errors[0]}')
+        return 1
+    _, rss, _ = process_usage()
+    print(f'{args.rows} 行合成数据；冷启动首次 rerun {cold[0] * 1000:.0f} ms，RSS {rss / 2**20:.0f} MB')
+
+    results = [run_load(int(n), notenames, args.rounds) for n in args.sessions.split(',')]
+    print(f'{"会话数":>6}{"rerun 数":>10}{"p50 (ms)":>10}{"p95 (ms)":>10}{"最大 (ms)":>11}'
+          f'{"rerun/s":>9}{"CPU (s)":>9}{"CPU 核":>8}{"RSS (MB)":>10}{"峰值 RSS (MB)":>14}')
+    for row in results:
+        print(f'{row["sessions"]:>6}{row["reruns"]:>10}{row["p50_ms"]:>10.0f}{row["p95_ms"]:>10.0f}'
+              f'{row["max_ms"]:>11.0f}{row["reruns_per_s"]:>9.1f}{row["cpu_s"]:>9.1f}{row["cpu_cores"]:>8.2f}'
+              f'{row["rss_bytes"] / 2**20:>10.0f}{row["peak_rss_bytes"] / 2**20:>14.0f}')
+        for error in row['errors']:
+            print(f'⚠️ {row["sessions"]} 个会话时出错：{error}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'rows': args.rows, 'cold_start_s': cold[0], 'results': results}, f, ensure_ascii=False, indent=2)
+    return 1 if any(row['errors'] for row in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
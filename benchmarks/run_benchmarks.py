@@ -0,0 +1,185 @@
+"""数据处理各阶段的耗时与内存基准
+
+用法 (在仓库根目录)：
+    python -m benchmarks.run_benchmarks                       # 10k / 1M / 10M 行
+    python -m benchmarks.run_benchmarks --sizes 10k,1m --json bench.json
+    python -m benchmarks.run_benchmarks --sizes 1m --baseline bench.json --tolerance 0.25
+
+每个阶段先计时 (取 --repeat 次中最快的一次)，再在 tracemalloc 下单独跑一次记录峰值内存。
+tracemalloc 只统计 Python / numpy 分配的内存，pandas 字符串列使用的 Arrow 缓冲区另列为
+"Arrow 增量" (阶段结束后 Arrow 内存池的净增长)。指定 --baseline 时，任一阶段耗时超过
+基准 (1 + tolerance) 倍即视为退化，退出码为 1。10M 行需要数 GB 内存。
+"""
+import argparse
+import datetime
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import pyarrow as pa
+
+from benchmarks.synthetic import make_raw_frame
+from charts import build_trend_figure
+from data_loader import clean_data
+from metrics import (
+    METRICS, PERIOD_PAIRS, HierarchyRollup, RangeSums, bots_on_day, build_dashboard_aggregates,
+    build_leaderboard, build_rollup_cube, calculate_group_metrics_table, compare_periods, daily_trend,
+    overview_metrics, reporting_periods,
+)
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+DEFAULT_SIZES = '10k,1m,10m'
+
+
+def _stage_clean(ctx):
+    ctx['df'] = clean_data(ctx['raw'])
+    return ctx['df']
+
+
+def _stage_cube(ctx):
+    ctx['cube'] = build_rollup_cube(ctx['df'])
+    ctx['periods'] = reporting_periods(ctx['cube']['Date'].iloc[-1].date())
+    return ctx['cube']
+
+
+def _stage_range_sums(ctx):
+    ctx['range_sums'] = RangeSums(ctx['cube'])
+    ctx['group_range_sums'] = RangeSums(ctx['cube'], 'Group')
+
+
+def _stage_compare(ctx):
+    periods = ctx['periods']
+    ctx['compare'] = compare_periods(ctx['cube'], ['Group', 'BotNoteName'],
+                                     *(periods[name] for name in PERIOD_PAIRS['week']))
+    return ctx['compare']
+
+
+def _stage_filtered_trend(ctx):
+    # 趋势分析的典型查询：最近 30 天、50 个机器人
+    today = ctx['periods']['today'][0]
+    notenames = ctx['cube']['BotNoteName'].drop_duplicates().iloc[:50].tolist()
+    return daily_trend(ctx['cube'], today - datetime.timedelta(days=29), today, notenames)
+
+
+def _stage_trend_figure(ctx):
+    trend = daily_trend(ctx['cube'], ctx['cube']['Date'].iloc[0])
+    fig = build_trend_figure(trend['Date'], {'咨询': trend['Consultations'], '线索': trend['Leads']}, title='趋势')
+    return fig.to_json()
+
+
+def _stage_hierarchy(ctx):
+    ctx['hierarchy'] = HierarchyRollup(ctx['cube'])
+    return ctx['hierarchy']
+
+
+def _stage_drill_down(ctx):
+    # 从全部一路下钻到第一个 Bot，每层取本月各子节点的合计
+    hierarchy, path = ctx['hierarchy'], ()
+    start, end = ctx['periods']['this_month']
+    while not hierarchy.is_leaf(path):
+        children = hierarchy.children(path, start, end)
+        path = tuple(children.iloc[0])[:-len(METRICS)]
+    return hierarchy.daily(path, start, end)
+
+
+# (阶段名, 函数)；按顺序执行，后面的阶段使用前面阶段放进 ctx 的结果
+STAGES = [
+    ('clean_data', _stage_clean),
+    ('build_rollup_cube', _stage_cube),
+    ('range_sums', _stage_range_sums),
+    ('overview_metrics', lambda ctx: overview_metrics(ctx['range_sums'], ctx['periods'])),
+    ('group_metrics', lambda ctx: calculate_group_metrics_table(ctx['group_range_sums'], ctx['periods'])),
+    ('compare_periods', _stage_compare),
+    ('leaderboards', lambda ctx: [build_leaderboard(ctx['compare'], m, scope='Group') for m in METRICS]),
+    ('bots_on_day', lambda ctx: bots_on_day(ctx['cube'], ctx['periods']['today'][0])),
+    ('month_trend', lambda ctx: daily_trend(ctx['cube'], ctx['periods']['this_month'][0])),
+    ('filtered_trend', _stage_filtered_trend),
+    ('trend_figure', _stage_trend_figure),
+    ('hierarchy', _stage_hierarchy),
+    ('drill_down', _stage_drill_down),
+    ('build_dashboard_aggregates', lambda ctx: build_dashboard_aggregates(ctx['df'])),
+]
+
+
+def measure(fn, ctx, repeat=1):
+    """返回 (最快耗时秒数, tracemalloc 峰值字节数, Arrow 内存池净增长字节数)"""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn(ctx)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    result = fn(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrow_delta = pa.total_allocated_bytes() - arrow_before
+    del result
+    return best, peak, arrow_delta
+
+
+def run_size(label, n_rows, repeat=1):
+    """对一种数据规模跑完全部阶段，返回 {阶段名: {seconds, peak_bytes, arrow_bytes}}"""
+    def generate(ctx):
+        ctx['raw'] = make_raw_frame(n_rows)
+
+    ctx, results = {}, {}
+    for name, fn in [('generate', generate)] + STAGES:
+        seconds, peak, arrow_delta = measure(fn, ctx, repeat)
+        results[name] = {'seconds': seconds, 'peak_bytes': peak, 'arrow_bytes': arrow_delta}
+    print(f'\n== {label} ({n_rows:,} 行, {ctx["raw"]["机器人备注名"].nunique():,} 个机器人, '
+          f'立方体 {len(ctx["cube"]):,} 行) ==')
+    print(f'{"阶段":<28}{"耗时 (ms)":>12}{"峰值内存 (MB)":>16}{"Arrow 增量 (MB)":>18}')
+    for name, row in results.items():
+        print(f'{name:<28}{row["seconds"] * 1000:>12.1f}{row["peak_bytes"] / 2**20:>16.1f}'
+              f'{row["arrow_bytes"] / 2**20:>18.1f}')
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    """耗时超过基准 (1 + tolerance) 倍的 (规模, 阶段, 当前秒数, 基准秒数)"""
+    regressions = []
+    for label, stages in results.items():
+        for name, row in stages.items():
+            base = baseline.get(label, {}).get(name)
+            if base and row['seconds'] > base['seconds'] * (1 + tolerance):
+                regressions.append((label, name, row['seconds'], base['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='看板数据处理各阶段的耗时与内存基准')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f'逗号分隔，可选 {",".join(SIZES)}')
+    parser.add_argument('--repeat', type=int, default=1, help='每个阶段计时次数 (取最快一次)')
+    parser.add_argument('--json', help='把结果写入该 JSON 文件')
+    parser.add_argument('--baseline', help='与之前 --json 写出的结果对比')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='允许的耗时增长比例')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for label in args.sizes.split(','):
+        label = label.strip().lower()
+        results[label] = run_size(label, SIZES[label], args.repeat)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for label, name, seconds, base in regressions:
+            print(f'⚠️ {label} / {name}: {seconds * 1000:.1f} ms (基准 {base * 1000:.1f} ms)')
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
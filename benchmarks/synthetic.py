@@ -0,0 +1,50 @@
+"""生成与 Google Sheets 原始表格结构相同的合成机器人数据"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_loader import MAPPING
+
+DATE_COLUMN = '日期'
+COLUMNS = [DATE_COLUMN] + list(MAPPING)
+
+
+def _labels(prefix, n):
+    return np.array([f'{prefix}{i:05d}' for i in range(n)], dtype=object)
+
+
+def make_raw_frame(n_rows, n_bots=None, n_groups=120, n_products=30,
+                   end=datetime.date(2026, 10, 15), seed=0, group_names=None):
+    """n_rows 行原始数据 (全部为字符串，和 get_all_values 读出来的一样)
+
+    每天每个机器人一行，按日期排列，以 end 为最后一天；n_bots 默认约为
+    n_rows / 365 (至少 200 个)，即大约一年的数据。每个机器人固定属于一个小组和产品。
+    指定 group_names 时用这些小组名 (此时忽略 n_groups)。
+    """
+    groups = np.array(group_names, dtype=object) if group_names else _labels('小组', n_groups)
+    n_bots = n_bots or max(200, n_rows // 365)
+    n_days = -(-n_rows // n_bots)
+    rng = np.random.default_rng(seed)
+
+    row = np.arange(n_rows)
+    bot = row % n_bots
+    day = row // n_bots
+    dates = pd.date_range(end=end, periods=n_days).strftime('%Y-%m-%d').to_numpy(dtype=object)
+    bot_group = rng.integers(0, len(groups), n_bots)
+    bot_product = rng.integers(0, n_products, n_bots)
+
+    consultations = rng.poisson(20, n_rows)
+    leads = rng.binomial(consultations, 0.2)
+    # 数值列查表转字符串，避免为每个值单独格式化
+    numbers = np.array([str(i) for i in range(int(consultations.max()) + 1)], dtype=object)
+
+    return pd.DataFrame({
+        DATE_COLUMN: dates[day],
+        '机器人用户名': _labels('user_bot', n_bots)[bot],
+        '机器人备注名': _labels('bot', n_bots)[bot],
+        '绑定的产品': _labels('产品', n_products)[bot_product][bot],
+        '所属小组': groups[bot_group][bot],
+        '咨询数': numbers[consultations],
+        '新增客户线索数': numbers[leads],
+    }, columns=COLUMNS)
@@ -0,0 +1,105 @@
+"""Plotly 图表构建 (不依赖 Streamlit)"""
+import numpy as np
+import plotly.graph_objects as go
+
+# 折线图点数超过该值时改用 WebGL 并降采样 (同时不再逐点显示数值标签)
+DEFAULT_MAX_POINTS = 400
+
+
+def plot_values(values):
+    """转成 numpy 数组；整数统一为 int64 (plotly 只对 int64 按取值范围压缩成 int8/int16 编码)"""
+    values = np.asarray(values)
+    return values.astype(np.int64) if values.dtype.kind in 'iu' else values
+
+
+def decimate_indices(columns, max_points):
+    """min-max 降采样：把序列平均分桶，每桶保留每条序列最小值和最大值的位置
+
+    columns 为若干等长数值数组，返回按顺序排列的保留位置 (始终包含首尾点)，
+    峰值和谷值不会因降采样丢失。
+    """
+    n = len(columns[0]) if columns else 0
+    if n <= max_points:
+        return np.arange(n)
+
+    n_buckets = max(1, (max_points - 2) // (2 * len(columns)))
+    bucket = np.arange(n) * n_buckets // n
+    starts = np.searchsorted(bucket, np.arange(n_buckets))
+    ends = np.append(starts[1:], n) - 1
+
+    keep = [np.array([0, n - 1])]
+    for values in columns:
+        order = np.lexsort((np.asarray(values, dtype=np.float64), bucket))
+        keep.append(order[starts])  # 每桶最小值
+        keep.append(order[ends])    # 每桶最大值
+    return np.unique(np.concatenate(keep))
+
+
+def build_trend_figure(dates, series, title, max_points=DEFAULT_MAX_POINTS):
+    """多指标趋势折线图
+
+    dates 为日期序列 (pandas Series)，series 为 {指标名: 数值序列}。
+    点数不多时按日期分类轴绘制，数值标签直接画在折线 trace 上；
+    超过 max_points 时改用 Scattergl + 日期轴，并做 min-max 降采样。
+    """
+    columns = [plot_values(values) for values in series.values()]
+    large = len(dates) > max_points
+
+    fig = go.Figure()
+    if large:
+        keep = decimate_indices(columns, max_points)
+        x = dates.to_numpy()[keep]
+        for name, values in zip(series, columns):
+            fig.add_trace(go.Scattergl(
+                x=x, y=values[keep], mode='lines', name=name,
+                hovertemplate=f'指标={name}<br>日期=%{{x|%Y.%m.%d}}<br>数量=%{{y}}<extra></extra>',
+            ))
+        fig.update_xaxes(type='date', tickformat='%Y.%m.%d')
+    else:
+        x = dates.dt.strftime('%m.%d').to_numpy()
+        for name, values in zip(series, columns):
+            fig.add_trace(go.Scatter(
+                x=x, y=values, mode='lines+text', name=name,
+                text=[f'{int(val)}' for val in values], textposition='top center',
+                hovertemplate=f'指标={name}<br>日期=%{{x}}<br>数量=%{{y}}<extra></extra>',
+            ))
+        fig.update_xaxes(tickangle=45, type='category', dtick=1)
+
+    fig.update_layout(title_text=title, xaxis_title='日期', yaxis_title='数量', legend_title='指标')
+    return fig
+
+
+def build_bot_bar_figure(bots, consultations, leads, title):
+    """各机器人咨询 / 线索分组柱状图"""
+    consultations, leads = plot_values(consultations), plot_values(leads)
+    max_val = max(consultations.max(), leads.max())
+    fig = go.Figure(data=[
+        go.Bar(name='咨询数', x=bots, y=consultations, text=consultations, textposition='outside', marker_color='#1f77b4'),
+        go.Bar(name='线索数', x=bots, y=leads, text=leads, textposition='outside', marker_color='#ff7f0e')
+    ])
+    fig.update_layout(
+        barmode='group',
+        title_text=title,
+        xaxis_title='机器人备注名',
+        yaxis_title='数量',
+        legend_title='指标'
+    )
+    fig.update_yaxes(range=[0, max_val * 1.1])
+    return fig
+
+
+def build_today_bar_figure(bots_today, today):
+    """今日机器人表现柱状图 (bots_today 为 metrics.bots_on_day 的结果)，页面和静态快照共用"""
+    return build_bot_bar_figure(
+        bots_today['BotNoteName'], bots_today['Consultations'], bots_today['Leads'],
+        title=f'今日 ({str(today)}) 机器人咨询与线索分布',
+    )
+
+
+def build_month_trend_figure(month_trend, month_start, max_points=DEFAULT_MAX_POINTS):
+    """当月总趋势折线图 (month_trend 为 metrics.daily_trend 的结果)，页面和静态快照共用"""
+    return build_trend_figure(
+        month_trend['Date'], {'咨询': month_trend['Consultations'], '线索': month_trend['Leads']},
+        title=f"{month_start.strftime('%Y年%m月')} 总咨询与线索趋势",
+        max_points=max_points,
+    )
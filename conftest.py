@@ -0,0 +1 @@
+"""pytest：从仓库根目录导入看板模块 (tests/ 下的测试直接 import data_loader 等)"""
@@ -0,0 +1,266 @@
+"""看板各页面共用的部分：配置、数据加载、图表缓存、趋势查询和筛选表单
+
+app.py 是入口：每次运行先加载数据、显示页头，再用 st.navigation 运行当前页面 (app_pages/)。
+页面通过 current_data() 取得入口本次运行使用的数据包，保证同一次运行中各部分是同一个数据版本。
+gspread 和 charts (plotly 图表构建) 只在真正用到时才导入，首页的 KPI 不需要等它们加载。
+"""
+import datetime
+import json
+import os
+
+import streamlit as st
+
+from data_loader import MultiSourceLoader
+from metrics import build_dashboard_aggregates, daily_trend, day_number, filter_rows
+from query_cache import QueryCache
+from refresher import BackgroundRefresher
+from sources import build_sources
+
+# --- 配置 ---
+SPREADSHEET_KEY = '1WCiVbP4mR7v5MgDvEeNV8YCthkTVv0rBVv1DX5YkB1U'
+# 数据来源 (见 sources.build_sources)：
+#   Google Sheets：表格 key + 工作表名列表 (worksheets 为 None 时读取第一个工作表)，
+#       例：{'type': 'sheets', 'key': '...', 'worksheets': ['2026-09', '2026-10']}
+#   本地导出文件：CSV / XLSX 路径或通配符，例：{'type': 'files', 'paths': ['history/*.xlsx']}
+DATA_SOURCES = [
+    {'type': 'sheets', 'key': SPREADSHEET_KEY, 'worksheets': None},
+]
+# 设置 BOT_DASHBOARD_SOURCE_FILES (多个路径 / 通配符用 os.pathsep 分隔) 时只读本地文件，可完全离线运行
+if os.environ.get('BOT_DASHBOARD_SOURCE_FILES'):
+    DATA_SOURCES = [{'type': 'files', 'paths': os.environ['BOT_DASHBOARD_SOURCE_FILES'].split(os.pathsep)}]
+# 同时刷新的数据来源数上限
+FETCH_WORKERS = 4
+# 本地 Arrow 快照目录 (每个工作表一个文件，partitions/ 下为按月冷存档)：冷启动时先用它渲染，Google Sheets 不可用时继续提供最后一份有效数据
+SNAPSHOT_DIR = os.environ.get(
+    'BOT_DASHBOARD_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'),
+)
+# 按月分区：最近 HOT_MONTHS 个自然月常驻内存，更早的月份存为快照目录下的 Parquet 文件，
+# 自定义区间往前查到时才按需读取，读取过的月份最多占用 COLD_CACHE_MB，超出时释放最久未用的月份
+HOT_MONTHS = 2
+COLD_CACHE_MB = 256
+# 后台刷新间隔 30分钟 (失败后 1 分钟重试)
+REFRESH_INTERVAL_SECONDS = 1800
+REFRESH_RETRY_SECONDS = 60
+# 各小组 Bot 涨跌榜取前几名
+LEADERBOARD_SIZE = 10
+# 折线图点数超过该值时降采样
+CHART_MAX_POINTS = 400
+# 各小组页按此顺序显示的小组
+REQUIRED_GROUPS = [
+    '项目一组', '项目二组', '项目三组', '项目四组',
+    '007TG组',
+    '投放一组', '投放二组', '投放三组'
+]
+# 设置 BOT_DASHBOARD_PUBLISH_DIR 时，每个数据版本把只读板块 (总览、今日机器人、当月趋势、各小组)
+# 发布成静态 HTML / JSON (见 publish.py)，只看数据的用户打开静态页面即可，不占用 Streamlit 会话；
+# BOT_DASHBOARD_PUBLISH_URL 为该目录对外的地址，设置后页面顶部显示链接
+PUBLISH_DIR = os.environ.get('BOT_DASHBOARD_PUBLISH_DIR')
+PUBLISH_URL = os.environ.get('BOT_DASHBOARD_PUBLISH_URL')
+# BOT_DASHBOARD_PERF_LOG=1 时把各板块耗时写成 JSON 日志行
+PERF_LOG_LINES = os.environ.get('BOT_DASHBOARD_PERF_LOG') == '1'
+# 趋势查询结果在进程内共享：会话里只保存筛选条件，相同查询的结果所有人共用一份
+QUERY_CACHE_MAX_ENTRIES = 64
+QUERY_CACHE_MAX_MB = 256
+DATE_OPTIONS = ("本月", "本周", "近7天", "近30天", "自定义日期")
+
+def open_client(creds):
+    # gspread 只在后台刷新线程第一次读取 Google Sheets 时导入，只读本地文件时完全不需要
+    import gspread
+    return gspread.service_account_from_dict(creds)
+
+# 缓存被清除或淘汰时停止旧的刷新线程，免得它继续轮询并写同一份快照
+@st.cache_resource(on_release=lambda refresher: refresher.stop())
+def get_refresher(_creds):
+    """进程内唯一的后台刷新器：定时并发增量拉取全部数据来源并重建派生数据"""
+    # ⚡️ 性能优化：只拉取上次之后追加的行 (首次、表头变化或表格变短时全量加载)，
+    # 同一表格的多个工作表一次批量读取，不同来源并发拉取
+    cold_cache = QueryCache(max_entries=1024, max_bytes=COLD_CACHE_MB * 1024 * 1024)
+    sources = build_sources(DATA_SOURCES, open_client=lambda: open_client(_creds), snapshot_dir=SNAPSHOT_DIR,
+                            cold_cache=cold_cache)
+    loader = MultiSourceLoader(sources, max_workers=FETCH_WORKERS, hot_months=HOT_MONTHS)
+    loader.load_snapshot()
+
+    def build(df):
+        # 派生数据只基于内存中的近期月份；最早日期和机器人列表包括冷存档。
+        # 同时记下各来源此刻的 (df, 冷存档) 视图，往前查到冷存档时按它读取，与数据包版本一致
+        bundle = build_dashboard_aggregates(df, leaderboard_size=LEADERBOARD_SIZE)
+        return {**bundle, **loader.history(), 'hot_from': loader.hot_from, 'view': loader.view()}
+
+    def publish(bundle):
+        # publish 只在配置了发布目录时才导入
+        from publish import publish_snapshot
+        publish_snapshot(bundle, PUBLISH_DIR, groups=REQUIRED_GROUPS, leaderboard_size=LEADERBOARD_SIZE,
+                         max_points=CHART_MAX_POINTS)
+
+    refresher = BackgroundRefresher(
+        loader,
+        build=build,
+        interval=REFRESH_INTERVAL_SECONDS,
+        retry_interval=REFRESH_RETRY_SECONDS,
+        on_update=publish if PUBLISH_DIR else None,
+    )
+    refresher.start()
+    return refresher
+
+def load_data():
+    """返回当前数据包；刷新在后台进行，只有首次启动且没有本地快照时才需要等待
+
+    本次运行使用的刷新器和数据包记在 session 中，页面用 current_data() 取得。
+    """
+    creds = None
+    if any(item.get('type', 'sheets') == 'sheets' for item in DATA_SOURCES):
+        if "gcp_service_account" not in st.secrets:
+            st.error("未配置 Secrets！请在 Streamlit Cloud 后台配置 gcp_service_account。")
+            st.stop()
+        creds = dict(st.secrets["gcp_service_account"])
+
+    refresher = get_refresher(creds)
+    if refresher.current() is None:
+        with st.spinner("正在加载数据..."):
+            refresher.wait_for_first_attempt()
+
+    bundle = refresher.current()
+    if bundle is None:
+        st.error(f"❌ 数据加载失败，请检查数据来源 (Google Sheets 权限或 Key、本地文件路径)。详细错误: {refresher.last_error}")
+        st.stop()
+    if refresher.last_error is not None:
+        source = "本地快照数据" if bundle['from_snapshot'] else "上一次加载的数据"
+        st.warning(f"⚠️ 无法读取数据来源，当前显示{source} (版本 {bundle['version']})。详细错误: {refresher.last_error}")
+    elif refresher.loader.errors:
+        failed = "；".join(f"{label}: {e}" for label, e in refresher.loader.errors.items())
+        st.warning(f"⚠️ 部分数据来源读取失败，这些来源显示上一次加载的数据：{failed}")
+    st.session_state.refresher, st.session_state.bundle = refresher, bundle
+    return refresher, bundle
+
+def current_data():
+    """入口脚本本次运行加载的 (刷新器, 数据包)"""
+    return st.session_state.refresher, st.session_state.bundle
+
+# 图表按 (数据版本, 图表规格) 缓存为 JSON
+@st.cache_data(max_entries=64)
+def get_figure_json(data_version, spec, _build):
+    return _build().to_json()
+
+def figure_json(spec, build):
+    """取缓存的图表 JSON，并记录命中情况和 JSON 大小"""
+    perf = st.session_state.perf
+    built = []
+    fig_json = get_figure_json(current_data()[1]['version'], spec, lambda: built.append(True) or build())
+    perf.cache_lookup(hit=not built)
+    perf.add_figure(fig_json)
+    return fig_json
+
+def render_figure(fig_json):
+    fig = json.loads(fig_json)
+    try:
+        st.plotly_chart(fig, use_container_width=True)
+    except:
+        st.plotly_chart(fig, width='stretch')
+
+@st.cache_resource
+def get_query_cache():
+    return QueryCache(max_entries=QUERY_CACHE_MAX_ENTRIES, max_bytes=QUERY_CACHE_MAX_MB * 1024 * 1024)
+
+def normalize_filters(filters):
+    """筛选条件的规范化形式 (与选择顺序无关)，用作查询缓存的 key"""
+    return (filters['start_date'], filters['end_date'], tuple(sorted(set(filters['notename']))))
+
+def cached_query(key, compute):
+    """走共享查询缓存，并记录本会话的命中情况"""
+    computed = []
+    value = get_query_cache().get_or_compute(key, lambda: computed.append(True) or compute())
+    st.session_state.perf.cache_lookup(hit=not computed)
+    return value
+
+def reaches_cold(start_date):
+    """区间是否早于内存中的近期月份 (需要读取冷存档)"""
+    hot_from = current_data()[1].get('hot_from')
+    return hot_from is not None and day_number(start_date) < hot_from
+
+def query_source_rows(filters):
+    """按筛选条件取原始行 (共享结果，只读)"""
+    refresher, bundle = current_data()
+    start_date, end_date, notenames = normalize_filters(filters)
+    def compute():
+        rows = refresher.loader.load_range(start_date, end_date, bundle['view']) if reaches_cold(start_date) else bundle['df']
+        # 整数日序号 Day 只供内部切片使用，不展示、不导出
+        return filter_rows(rows, start_date, end_date, notenames).drop(columns='Day')
+    return cached_query((bundle['version'], 'source_rows', start_date, end_date, notenames), compute)
+
+def query_trend(filters):
+    """按筛选条件做每日聚合 (近期基于立方体，往前查到冷存档时基于原始行；共享结果，只读)"""
+    refresher, bundle = current_data()
+    start_date, end_date, notenames = normalize_filters(filters)
+    def compute():
+        rows = refresher.loader.load_range(start_date, end_date, bundle['view']) if reaches_cold(start_date) else bundle['cube']
+        return daily_trend(rows, start_date, end_date, notenames)
+    return cached_query((bundle['version'], 'trend', start_date, end_date, notenames), compute)
+
+# --- 8-9. 趋势分析筛选表单 (趋势分析页和源数据页共用，筛选条件保存在 session 中) ---
+def render_filter_form():
+    """渲染筛选表单并返回当前生效的筛选条件"""
+    bundle = current_data()[1]
+    periods = bundle['periods']
+    current_month_start, today = periods['this_month']
+    current_week_start, _ = periods['this_week']
+
+    if 'product_filters' not in st.session_state:
+        st.session_state.product_filters = {
+            'date_option': '本月',
+            'notename': [],
+            'start_date': current_month_start,
+            'end_date': today,
+        }
+        st.session_state.query_submitted = False
+
+    with st.form("product_trend_form"):
+
+        col1, col2 = st.columns(2)
+        with col1:
+            date_option = st.selectbox(
+                "时间范围:",
+                DATE_OPTIONS,
+                index=DATE_OPTIONS.index(st.session_state.product_filters['date_option']),
+                key='form_date_option'
+            )
+        with col2:
+            col_notename = st.multiselect("机器人备注名", bundle['notenames'], default=st.session_state.product_filters['notename'], key='form_notename')
+
+        start_date = bundle['min_date']
+        end_date = today
+
+        if date_option == "本月":
+            start_date = current_month_start
+        elif date_option == "本周":
+            start_date = current_week_start
+        elif date_option == "近7天":
+            start_date = today - datetime.timedelta(days=6)
+        elif date_option == "近30天":
+            start_date = today - datetime.timedelta(days=29)
+        elif date_option == "自定义日期":
+            st.markdown("---")
+            st.caption("自定义日期区间:")
+            date_range_cols = st.columns(2)
+            with date_range_cols[0]:
+                start_date = st.date_input("起始日期", st.session_state.product_filters['start_date'], key='form_start_date', max_value=today, label_visibility="collapsed")
+            with date_range_cols[1]:
+                end_date = st.date_input("结束日期", st.session_state.product_filters['end_date'], key='form_end_date', max_value=today, label_visibility="collapsed")
+
+        submitted = st.form_submit_button("🔍 查询趋势 / 更新数据源")
+
+    # --- 9. 执行筛选 ---
+    if submitted or not st.session_state.query_submitted:
+
+        current_notenames = col_notename
+
+        st.session_state.query_submitted = True
+        st.session_state.product_filters = {
+            'date_option': date_option,
+            'notename': current_notenames,
+            'start_date': start_date,
+            'end_date': end_date,
+        }
+        # 筛选条件已写入 session，本次运行中直接使用，无需再 rerun
+
+    return st.session_state.product_filters
@@ -0,0 +1,515 @@
+"""数据加载与清洗 (不依赖 Streamlit，可单独导入测试)"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# 表头映射 (第一列固定映射为 Date)
+MAPPING = {
+    '机器人用户名': 'BotUsername',
+    '机器人备注名': 'BotNoteName',
+    '绑定的产品': 'Product',
+    '所属小组': 'Group',
+    '咨询数': 'Consultations',
+    '新增客户线索数': 'Leads',
+}
+
+# 维度列存为分类类型 (类别按字典序排列)，取值重复很多，比逐行存字符串省得多
+DIMENSIONS = ['Group', 'Product', 'BotNoteName', 'BotUsername']
+
+# 快照中数据的格式版本，清洗结果的列或类型变化时加一，旧快照会被忽略
+SNAPSHOT_FORMAT = 2
+
+# 表格中出现的日期格式，按顺序显式解析，避免 pandas 逐行推断格式
+DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M:%S')
+
+
+def compute_data_version(raw_df, base_version=''):
+    """根据原始表格内容计算数据版本号 (内容不变则版本不变)
+
+    传入 base_version 时表示在该版本基础上追加了 raw_df 这些行。
+    """
+    digest = hashlib.sha1(base_version.encode('utf-8'))
+    digest.update('\x1f'.join(map(str, raw_df.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(raw_df, index=False).values.tobytes())
+    return digest.hexdigest()[:12]
+
+
+def parse_dates(values):
+    """按 DATE_FORMATS 依次显式解析日期，剩余无法识别的值才交给 pandas 推断"""
+    values = values.astype(str).str.strip()
+    parsed = pd.to_datetime(values, format=DATE_FORMATS[0], errors='coerce')
+    for fmt in DATE_FORMATS[1:]:
+        pending = parsed.isna() & (values != '')
+        if not pending.any():
+            return parsed
+        parsed[pending] = pd.to_datetime(values[pending], format=fmt, errors='coerce')
+    pending = parsed.isna() & (values != '')
+    if pending.any():
+        parsed[pending] = pd.to_datetime(values[pending], errors='coerce')
+    return parsed
+
+
+def day_keys(dates):
+    """日期列转整数日序号 (距 1970-01-01 的天数，int32)"""
+    return dates.to_numpy().astype('datetime64[D]').astype(np.int32)
+
+
+def clean_data(raw_df):
+    """清洗原始表格，返回按日期排好序的紧凑 DataFrame
+
+    维度列为分类类型，咨询数 / 线索数为 int32，另加整数日序号列 Day (int32)，
+    按日期切片时直接二分查找 Day，不必逐行比较时间戳。
+    """
+    df = raw_df.copy(deep=False)
+    df.columns = df.columns.astype(str).str.strip()
+    df = df.rename(columns={df.columns[0]: 'Date', **MAPPING})
+    df['Date'] = parse_dates(df['Date'])
+    df['Consultations'] = pd.to_numeric(df['Consultations'], errors='coerce').fillna(0).astype(np.int32)
+    df['Leads'] = pd.to_numeric(df['Leads'], errors='coerce').fillna(0).astype(np.int32)
+    for col in DIMENSIONS:
+        if col in df:
+            df[col] = df[col].astype('category')
+    df = df.dropna(subset=['Date'])
+    df = df.sort_values('Date', ascending=True, kind='stable')
+    df['Day'] = day_keys(df['Date'])
+    return df
+
+
+def concat_frames(frames):
+    """拼接多个清洗后的 DataFrame，维度列取类别并集后仍保持分类类型
+
+    类别没有变化的部分不需要重新编码 (增量追加时通常只有新行这一小块需要)。
+    """
+    frames = list(frames)
+    for col in DIMENSIONS:
+        present = [frame[col] for frame in frames if col in frame]
+        if not present or not all(isinstance(values.dtype, pd.CategoricalDtype) for values in present):
+            continue
+        categories = present[0].cat.categories
+        for values in present[1:]:
+            categories = categories.union(values.cat.categories)
+        dtype = pd.CategoricalDtype(categories)
+        frames = [
+            frame.assign(**{col: frame[col].astype(dtype)}) if col in frame and frame[col].dtype != dtype else frame
+            for frame in frames
+        ]
+    return pd.concat(frames)
+
+
+def archive_cold_rows(df, archive, cutoff_day, replace=False):
+    """把 df 中 cutoff_day 之前的行写入冷存档 (partitions.MonthArchive)，返回剩下的近期行
+
+    replace 为 True 表示 df 是刚全量加载的完整数据，存档以它为准整体替换。
+    近期行另存一份副本，冷数据占用的内存随之释放。
+    """
+    if df.empty or 'Day' not in df:
+        if replace:
+            archive.store(df, replace=True)
+        return df
+    split = int(np.searchsorted(df['Day'].to_numpy(), cutoff_day, side='left'))
+    if split == 0 and not replace:
+        return df
+    archive.store(df.iloc[:split], replace=replace)
+    return df.iloc[split:].copy()
+
+
+def frame_view(df, archive):
+    """一个数据部分的视图：(近期行, 冷存档, 当时已存档的月份)，见 rows_in_range()"""
+    return df, archive, (frozenset(archive.months()) if archive is not None else None)
+
+
+def rows_in_range(df, archive, lo_day, hi_day, months=None):
+    """[lo_day, hi_day] 内的行 (冷存档 + 内存中的近期数据)，返回 DataFrame 列表
+
+    months 为 frame_view() 记下的已存档月份：取视图之后才移入存档的月份仍在视图的 df 中，
+    不会再从存档重复读取。
+    """
+    parts = []
+    if archive is not None:
+        cold = archive.load_range(lo_day, hi_day, months)
+        if cold is not None and not cold.empty:
+            parts.append(cold)
+    if not df.empty and 'Day' in df:
+        days = df['Day'].to_numpy()
+        lo = np.searchsorted(days, lo_day, side='left')
+        hi = np.searchsorted(days, hi_day, side='right')
+        if hi > lo:
+            parts.append(df.iloc[lo:hi])
+    return parts
+
+
+def history_of(df, archive):
+    """包括冷存档在内的 (最早日序号, 机器人备注名集合)"""
+    min_days, notenames = [], set()
+    if archive is not None and archive.months():
+        min_days.append(archive.min_day())
+        notenames.update(archive.notenames())
+    if not df.empty and 'Day' in df:
+        min_days.append(int(df['Day'].iloc[0]))
+        notenames.update(df['BotNoteName'].dropna().astype(str).unique().tolist())
+    return min(min_days, default=None), notenames
+
+
+def column_letter(n):
+    """列序号 (从 1 开始) 转 A1 记法中的列字母"""
+    letters = ''
+    while n > 0:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _pad_row(row, width):
+    """Sheets API 会省略行尾空单元格，补齐到表头宽度"""
+    row = list(row[:width])
+    return row + [''] * (width - len(row))
+
+
+def _trim_row(row):
+    row = list(row)
+    while row and row[-1] == '':
+        row.pop()
+    return row
+
+
+class IncrementalSheetLoader:
+    """增量加载 Google Sheets (机器人表格只会在底部追加行)
+
+    记住已读取的行数，之后只拉取该位置之后的新行，清洗后追加到已有的
+    DataFrame。表头变化、表格变短或最后一行被改动时回退为全量加载。
+    worksheet 只需提供 get_all_values() 和 batch_get()，可用本地替身代替 gspread。
+
+    指定 snapshot_path 时，每次数据变化后把清洗结果连同加载位置写入本地
+    Arrow 快照；进程重启后可直接从快照恢复并继续增量加载。
+    指定 archive (partitions.MonthArchive) 时，archive_before() 把较早的月份移入存档，
+    内存和快照中只保留近期的行；之后每次刷新都先按同一分界移走冷数据再发布新的 df，
+    df 与存档任何时候都不重叠。
+    """
+
+    def __init__(self, snapshot_path=None, archive=None):
+        self.header = None
+        self.ingested_rows = 0  # 已读取的数据行数 (不含表头)
+        self.last_row = None    # 最后读取的一行原始值，用来确认表格没有被改短或改写
+        self.data_version = ''
+        self.df = pd.DataFrame()
+        self.full_reloads = 0
+        self.snapshot_path = snapshot_path
+        self.from_snapshot = False  # 当前数据来自本地快照，尚未与 Sheets 同步
+        self.archive = archive
+        self._archive_replace = False  # 全量重新加载后，下次存档以 df 为准整体替换
+        self.cutoff_day = None  # 冷存档的分界日序号 (archive_before() 设置)
+        self._lock = threading.Lock()
+
+    def refresh(self, worksheet):
+        """拉取最新数据，返回 (数据版本, 清洗后的 DataFrame)"""
+        return self.refresh_with(worksheet.batch_get, worksheet.get_all_values)
+
+    def tail_ranges(self):
+        """增量拉取要读取的区间：表头行 + 从最后读取的那一行开始的尾部；尚未加载过时为 None"""
+        if self.header is None:
+            return None
+        # 表头在第 1 行，第 i 条数据在第 i + 1 行
+        anchor = self.ingested_rows + 1
+        return ['1:1', f'A{anchor}:{column_letter(len(self.header))}']
+
+    def refresh_with(self, fetch_tail, fetch_full):
+        """按给定的读取函数刷新：fetch_tail(tail_ranges()) 返回 [表头行, 尾部行]，fetch_full() 返回全部行
+
+        多个工作表合并成一次批量读取时，由调用方预先取好数据再传入。
+        """
+        with self._lock:
+            previous_version = self.data_version
+            ranges = self.tail_ranges()
+            if ranges is None or not self._append_new_rows(*fetch_tail(ranges)):
+                self._full_reload(fetch_full())
+            archived = self._archive_cold()
+            if archived or self.data_version != previous_version:
+                self.save_snapshot()
+            self.from_snapshot = False
+            return self.data_version, self.df
+
+    def load_snapshot(self):
+        """冷启动：内存映射读取本地快照并恢复加载位置，快照不存在或损坏时返回 False"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with pa.memory_map(self.snapshot_path) as source:
+                table = pa.ipc.open_file(source).read_all()
+            state = json.loads(table.schema.metadata[b'loader_state'])
+            if state.get('format') != SNAPSHOT_FORMAT:
+                logger.warning('本地快照格式已过期，忽略快照: %s', self.snapshot_path)
+                return False
+            if self.archive is not None and state.get('archive', {}) != self._archive_hashes():
+                logger.warning('本地快照与冷存档不一致，忽略快照: %s', self.snapshot_path)
+                return False
+            df = table.to_pandas(split_blocks=True, self_destruct=True)
+        except (OSError, KeyError, ValueError, pa.ArrowException) as e:
+            logger.warning('读取本地快照失败，忽略快照: %s', e)
+            return False
+
+        with self._lock:
+            self.df = df
+            self.header = state['header']
+            self.ingested_rows = state['ingested_rows']
+            self.last_row = state['last_row']
+            self.data_version = state['data_version']
+            self.from_snapshot = True
+        return True
+
+    def save_snapshot(self):
+        """把当前数据和加载位置写入 Arrow 快照 (先写临时文件再替换，保证原子性)"""
+        if not self.snapshot_path or self.header is None:
+            return
+        state = {
+            'format': SNAPSHOT_FORMAT,
+            'header': self.header,
+            'ingested_rows': self.ingested_rows,
+            'last_row': self.last_row,
+            'data_version': self.data_version,
+            'archive': self._archive_hashes(),
+        }
+        table = pa.Table.from_pandas(self.df)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'loader_state': json.dumps(state, ensure_ascii=False).encode('utf-8'),
+        })
+        tmp_path = f'{self.snapshot_path}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path) or '.', exist_ok=True)
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning('写入本地快照失败: %s', e)
+
+    def _archive_hashes(self):
+        if self.archive is None:
+            return {}
+        return {name: info['hash'] for name, info in self.archive.manifest.items()}
+
+    def archive_before(self, cutoff_day):
+        """把 cutoff_day 之前的行移入冷存档，内存中只保留之后的行"""
+        if self.archive is None:
+            return
+        with self._lock:
+            self.cutoff_day = cutoff_day
+            if self._archive_cold():
+                self.save_snapshot()
+
+    def _archive_cold(self):
+        """按 cutoff_day 把较早的行移入冷存档 (调用方持有 _lock)，df 有变化时返回 True"""
+        if self.archive is None or self.cutoff_day is None:
+            return False
+        df = archive_cold_rows(self.df, self.archive, self.cutoff_day, replace=self._archive_replace)
+        if df is self.df and not self._archive_replace:
+            return False
+        self.df = df
+        self._archive_replace = False
+        return True
+
+    def view(self):
+        """当前的 (df, 冷存档, 已存档月份)，与刷新和存档互斥，两者不会重叠"""
+        with self._lock:
+            return frame_view(self.df, self.archive)
+
+    def history(self):
+        with self._lock:
+            return history_of(self.df, self.archive)
+
+    def _full_reload(self, raw_data):
+        self.full_reloads += 1
+
+        if not raw_data:
+            self.header = None
+            self.ingested_rows = 0
+            self.last_row = None
+            self.data_version = ''
+            self.df = pd.DataFrame()
+            self._archive_replace = True
+            return
+
+        header = list(raw_data[0])
+        rows = [_pad_row(row, len(header)) for row in raw_data[1:]]
+        raw_df = pd.DataFrame(rows, columns=header)
+        data_version = compute_data_version(raw_df)
+
+        # 内容未变化时沿用已清洗的结果
+        if data_version != self.data_version:
+            self.df = clean_data(raw_df)
+            self.data_version = data_version
+            self._archive_replace = True
+        self.header = header
+        self.ingested_rows = len(rows)
+        self.last_row = rows[-1] if rows else header
+
+    def _append_new_rows(self, header_values, tail_values):
+        """追加尾部的新行；需要回退为全量加载时返回 False"""
+        width = len(self.header)
+        current_header = header_values[0] if header_values else []
+        tail = [_pad_row(row, width) for row in tail_values]
+        if (_trim_row(current_header) != _trim_row(self.header)
+                or not tail or tail[0] != self.last_row):
+            return False
+
+        new_rows = tail[1:]
+        if not new_rows:
+            return True
+
+        raw_df = pd.DataFrame(new_rows, columns=self.header)
+        raw_df.index = pd.RangeIndex(self.ingested_rows, self.ingested_rows + len(new_rows))
+        new_df = clean_data(raw_df)
+
+        df = concat_frames([self.df, new_df]) if not self.df.empty else new_df
+        if not self.df.empty and not new_df.empty and new_df['Date'].min() < self.df['Date'].max():
+            df = df.sort_values('Date', ascending=True, kind='stable')
+
+        self.df = df
+        self.data_version = compute_data_version(raw_df, self.data_version)
+        self.ingested_rows += len(new_rows)
+        self.last_row = new_rows[-1]
+        return True
+
+
+class MultiSourceLoader:
+    """并发刷新多个数据来源 (见 sources.py)，合并为一个 DataFrame
+
+    各来源在最多 max_workers 个线程中同时刷新。各部分 (工作表 / 文件) 的列都经 MAPPING
+    映射后按列名合并，缺少的列为空值。某个部分读取失败只记录在 errors 中，继续使用它
+    上一次的数据；本次没有任何部分刷新成功时才抛出异常。
+
+    指定 hot_months 时只有最近 hot_months 个自然月的行留在 df 中，更早的行由各来源
+    写入冷存档，需要时用 load_range() 读取；数据版本仍然覆盖全部数据。刷新在后台进行，
+    查询应按构建数据包时 view() 取得的视图读取，才不会混入之后刷新的数据。
+    """
+
+    def __init__(self, sources, max_workers=4, hot_months=None):
+        self.sources = list(sources)
+        self.max_workers = max_workers
+        self.hot_months = hot_months
+        self.errors = {}  # 来源名称 -> 最近一次刷新的异常
+        self.last_timings = {}  # 最近一次刷新各步骤耗时 (秒)
+        self.data_version = ''
+        self.df = pd.DataFrame()
+        self.hot_from = None  # df 中最早可能出现的日序号，None 表示全部数据都在内存中
+        self.from_snapshot = False
+
+    @property
+    def loaded(self):
+        """是否至少有一个来源已有数据 (来自快照或最近一次刷新)"""
+        return any(source.loaded for source in self.sources)
+
+    def load_snapshot(self):
+        """从各来源的本地快照恢复，至少恢复了一个时返回 True"""
+        restored = [source.load_snapshot() for source in self.sources]
+        if not any(restored):
+            return False
+        self._archive_cold()
+        self._combine()
+        self.from_snapshot = True
+        return True
+
+    def refresh(self):
+        """并发刷新全部来源，返回 (合并后的数据版本, 合并后的 DataFrame)"""
+        errors = {}
+        succeeded = 0
+        fetch_seconds, clean_seconds = [], []
+        workers = max(1, min(self.max_workers, len(self.sources)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='source-refresh') as pool:
+            futures = [pool.submit(source.refresh) for source in self.sources]
+            for future in futures:
+                source_errors, source_succeeded, fetched, cleaned = future.result()
+                errors.update(source_errors)
+                succeeded += source_succeeded
+                fetch_seconds.append(fetched)
+                clean_seconds.append(cleaned)
+
+        self.errors = errors
+        if errors and not succeeded:
+            raise RuntimeError('; '.join(f'{label}: {e}' for label, e in errors.items()))
+        for label, e in errors.items():
+            logger.warning('读取数据来源 %s 失败: %s', label, e)
+        started = time.perf_counter()
+        self._archive_cold()
+        self._combine()
+        # 各来源并发拉取，拉取耗时取最慢的一个；清洗在各线程内进行，按合计统计
+        self.last_timings = {
+            'fetch': max(fetch_seconds, default=0.0),
+            'clean': sum(clean_seconds),
+            'merge': time.perf_counter() - started,
+        }
+        self.from_snapshot = False
+        return self.data_version, self.df
+
+    def view(self):
+        """全部部分的 (df, 冷存档, 已存档月份) 视图，传给 load_range()"""
+        return [part for source in self.sources for part in source.view()]
+
+    def load_range(self, start, end, view=None):
+        """[start, end] 内全部来源的行 (包括冷存档)，按日期排序
+
+        view 为之前 view() 取得的视图时按它读取，省略时用各来源当前的视图。
+        """
+        lo_day, hi_day = (int(day) for day in day_keys(pd.to_datetime([start, end])))
+        if view is None:
+            view = self.view()
+        frames = [part for df, archive, months in view
+                  for part in rows_in_range(df, archive, lo_day, hi_day, months)]
+        if not frames:
+            return self.df.iloc[:0]
+        if len(frames) == 1:
+            return frames[0]
+        return concat_frames(frames).reset_index(drop=True).sort_values('Date', ascending=True, kind='stable')
+
+    def history(self):
+        """包括冷存档在内的最早日期和全部机器人备注名：{'min_date', 'notenames'}"""
+        min_days, notenames = [], set()
+        for source in self.sources:
+            for min_day, names in source.history():
+                if min_day is not None:
+                    min_days.append(min_day)
+                notenames.update(names)
+        min_date = pd.Timestamp(np.datetime64(min(min_days), 'D')).date() if min_days else None
+        return {'min_date': min_date, 'notenames': sorted(notenames)}
+
+    def _archive_cold(self):
+        if not self.hot_months:
+            return
+        # partitions 依赖本模块，在这里再导入
+        from partitions import hot_cutoff_day
+
+        latest = [int(df['Day'].iloc[-1]) for source in self.sources
+                  for _, _, df in source.frames() if not df.empty and 'Day' in df]
+        if not latest:
+            return
+        cutoff = hot_cutoff_day(max(latest), self.hot_months)
+        for source in self.sources:
+            source.archive_before(cutoff)
+        self.hot_from = cutoff
+
+    def _combine(self):
+        parts = [part for source in self.sources for part in source.frames()]
+        fingerprint = '\x1f'.join(f'{label}:{version}' for label, version, _ in parts)
+        data_version = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:12] if parts else ''
+        if data_version == self.data_version:
+            return
+
+        frames = [df for _, _, df in parts if not df.empty]
+        if not frames:
+            df = pd.DataFrame()
+        elif len(frames) == 1:
+            df = frames[0]
+        else:
+            df = concat_frames(frames).reset_index(drop=True).sort_values('Date', ascending=True, kind='stable')
+        self.df = df
+        self.data_version = data_version
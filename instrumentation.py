@@ -0,0 +1,87 @@
+"""页面各板块的耗时与缓存统计 (不依赖 Streamlit)"""
+import datetime
+import json
+import logging
+import time
+import uuid
+from collections import deque
+
+logger = logging.getLogger('bot_dashboard.perf')
+
+
+def enable_log_lines(level=logging.INFO):
+    """把 bot_dashboard.perf 的结构化日志输出到 stderr (只添加一次 handler)"""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+class PerfRecorder:
+    """按顺序记录页面各板块的耗时、处理行数、缓存命中情况和图表 JSON 大小
+
+    用 begin(name) 开始一个板块 (同时结束上一个)，end() 结束当前板块；脚本从上到下
+    执行，不需要把整段代码缩进到 with 语句里。每个会话一个实例，只保留最近
+    max_records 条记录；log_lines 为 True 时每条记录额外写一行 JSON 日志。
+    """
+
+    def __init__(self, max_records=200, log_lines=False):
+        self.records = deque(maxlen=max_records)
+        self.log_lines = log_lines
+        self.run_id = None
+        self._current = None
+        self._started = None
+
+    def start_run(self):
+        """开始一次完整的 rerun，之后的记录都带上新的 run id
+
+        上一次运行被 st.stop() 或 rerun 打断时，未结束的板块直接丢弃：它的计时包含了
+        两次运行之间的空闲时间，记录下来只会是虚高的耗时。
+        """
+        self._current = None
+        self._started = None
+        self.run_id = uuid.uuid4().hex[:8]
+        return self.run_id
+
+    def begin(self, name, rows=None):
+        self.end()
+        self._current = {
+            'run': self.run_id,
+            'section': name,
+            'at': datetime.datetime.now().strftime('%H:%M:%S'),
+            'seconds': 0.0,
+            'rows': rows,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'figure_bytes': 0,
+        }
+        self._started = time.perf_counter()
+
+    def end(self):
+        record = self._current
+        if record is None:
+            return
+        record['seconds'] = time.perf_counter() - self._started
+        self._current = None
+        self.records.append(record)
+        if self.log_lines:
+            logger.info(json.dumps({'event': 'dashboard_section', **record}, ensure_ascii=False, default=str))
+
+    def add_rows(self, rows):
+        if self._current is not None:
+            self._current['rows'] = (self._current['rows'] or 0) + int(rows)
+
+    def cache_lookup(self, hit):
+        if self._current is not None:
+            self._current['cache_hits' if hit else 'cache_misses'] += 1
+
+    def add_figure(self, payload):
+        if self._current is not None:
+            self._current['figure_bytes'] += len(payload)
+
+    def run_records(self, run_id=None):
+        """某次 rerun (默认最近一次) 的全部记录"""
+        run_id = run_id or self.run_id
+        return [record for record in self.records if record['run'] == run_id]
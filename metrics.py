@@ -0,0 +1,504 @@
+"""指标计算 (不依赖 Streamlit，可单独导入测试)"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+# 数据立方体的维度和指标
+CUBE_KEYS = ['Date', 'Group', 'Product', 'BotNoteName', 'BotUsername']
+METRICS = ['Consultations', 'Leads']
+
+# 常用对比：当前周期 vs 上一周期 (对应 periods 中的区间名)
+PERIOD_PAIRS = {
+    'day': ('today', 'yesterday'),
+    'week': ('this_week', 'last_week'),
+    'month': ('this_month', 'last_month'),
+}
+
+
+def reporting_periods(today):
+    """以 today 为基准的各对比周期 (start, end)"""
+    month_start = today.replace(day=1)
+    week_start = today - datetime.timedelta(days=today.weekday())
+    last_month_end = month_start - datetime.timedelta(days=1)
+    yesterday = today - datetime.timedelta(days=1)
+    return {
+        'this_month': (month_start, today),
+        'last_month': (last_month_end.replace(day=1), last_month_end),
+        'this_week': (week_start, today),
+        'last_week': (week_start - datetime.timedelta(days=7), week_start - datetime.timedelta(days=1)),
+        'today': (today, today),
+        'yesterday': (yesterday, yesterday),
+    }
+
+
+def build_rollup_cube(df):
+    """按 (日期, 小组, 产品, 机器人备注名, 机器人用户名) 预聚合的日粒度数据，按日期排序
+
+    各板块只需要这几个维度，查询立方体比扫描原始行便宜得多。
+    维度为空的行同样保留，保证总数与原始数据一致。
+    """
+    cube = (
+        df.assign(Date=df['Date'].dt.normalize())
+        .groupby(CUBE_KEYS, dropna=False, sort=True, observed=True)[METRICS]
+        .sum()
+        .astype(np.int32)
+        .reset_index()
+    )
+    cube['Day'] = cube['Date'].to_numpy().astype('datetime64[D]').astype(np.int32)
+    return cube
+
+
+def slice_dates(cube, start, end=None):
+    """取出 [start, end] 日期区间内的行 (按自然日包含 end 当天，end 为空表示不设上限)
+
+    cube 为按日期排序、带整数日序号列 Day 的数据 (立方体或清洗后的原始数据)，
+    区间边界用二分查找定位，返回的是连续切片。
+    """
+    days = cube['Day'].to_numpy()
+    lo = np.searchsorted(days, day_number(start), side='left')
+    hi = len(days) if end is None else np.searchsorted(days, day_number(end), side='right')
+    return cube.iloc[lo:max(lo, hi)]
+
+
+def day_number(value):
+    """日期 (date / Timestamp / datetime64) 转整数日序号 (距 1970-01-01 的天数)"""
+    return int(np.datetime64(value, 'D').astype(np.int64))
+
+
+class RangeSums:
+    """日期区间求和引擎
+
+    把立方体按 (日, scope) 汇总，再沿日期做累加得到前缀和表：
+    prefix[i, s, m] 为 scope s 在前 i 个有数据的日期上指标 m 的合计。
+    任意 [start, end] 区间只需两次 searchsorted 定位边界，再做一次减法。
+    by 为空时只有一个全局 scope；否则每个取值一个 scope (空值不计入)。
+    """
+
+    def __init__(self, cube, by=None):
+        days = cube['Day'].to_numpy().astype(np.int64)
+        self.day_numbers = np.unique(days)
+        day_pos = np.searchsorted(self.day_numbers, days)
+
+        if by is None:
+            codes = np.zeros(len(cube), dtype=np.int64)
+            self.scopes = [None]
+        else:
+            codes, uniques = pd.factorize(cube[by], sort=True)
+            self.scopes = list(uniques)
+        self._scope_pos = {key: i for i, key in enumerate(self.scopes)}
+
+        valid = codes >= 0
+        n_days, n_scopes = len(self.day_numbers), len(self.scopes)
+        flat = day_pos[valid] * n_scopes + codes[valid]
+        table = np.stack([
+            np.bincount(flat, weights=cube[m].to_numpy(np.float64)[valid], minlength=n_days * n_scopes)
+            for m in METRICS
+        ], axis=-1).reshape(n_days, n_scopes, len(METRICS))
+
+        self.prefix = np.zeros((n_days + 1, n_scopes, len(METRICS)))
+        np.cumsum(table, axis=0, out=self.prefix[1:])
+
+    def _bounds(self, start, end):
+        lo = np.searchsorted(self.day_numbers, day_number(start), side='left')
+        hi = np.searchsorted(self.day_numbers, day_number(end), side='right')
+        return lo, max(lo, hi)
+
+    def totals(self, start, end):
+        """所有 scope 在 [start, end] 内的合计，形状为 (scope 数, 指标数)"""
+        lo, hi = self._bounds(start, end)
+        return self.prefix[hi] - self.prefix[lo]
+
+    def total(self, start, end, scope=None):
+        """单个 scope 在 [start, end] 内各指标的合计，scope 不存在时为 0"""
+        pos = self._scope_pos.get(scope)
+        if pos is None:
+            return np.zeros(len(METRICS))
+        lo, hi = self._bounds(start, end)
+        return self.prefix[hi, pos] - self.prefix[lo, pos]
+
+
+# 分层汇总的各层级 (全部 → 产品 → 小组 → Bot)，Bot 由备注名 + 用户名确定
+HIERARCHY_LEVELS = [[], ['Product'], ['Product', 'Group'], ['Product', 'Group', 'BotNoteName', 'BotUsername']]
+MISSING_LABEL = '(未填写)'
+
+
+def _hierarchy_codes(column):
+    """(标签数组, 每行的标签编号)；空值归入排在最后的 MISSING_LABEL"""
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype('category')
+    labels = column.cat.categories.to_numpy(dtype=object)
+    codes = column.cat.codes.to_numpy().astype(np.int64)
+    if (codes < 0).any():
+        codes[codes < 0] = len(labels)
+        labels = np.append(labels, MISSING_LABEL)
+    return labels, codes
+
+
+class HierarchyRollup:
+    """产品 → 小组 → Bot 分层日汇总，下钻时只读预先算好的节点，不再对原始数据分组
+
+    节点用标签元组表示：() 为全部，(产品,)、(产品, 小组)、(产品, 小组, 备注名, 用户名)。
+    各维度的分类编号按位组合成一个整数，前几位就是上层节点的编号，所以各层节点都按标签
+    排序，同一父节点的子节点连续排列。每一层把立方体按 (节点, 日) 汇总一次 (只保留有数据
+    的组合)，按 节点 × 日 排序后累加得到前缀和；查询 [start, end] 内全部子节点的合计只需
+    两次向量化 searchsorted。维度为空的行归入 MISSING_LABEL 节点，子节点合计总是等于父节点。
+    """
+
+    def __init__(self, cube):
+        columns = HIERARCHY_LEVELS[-1]
+        self.labels, digits = zip(*(_hierarchy_codes(cube[col]) for col in columns))
+        self.radix = [len(labels) for labels in self.labels]
+        self._label_codes = [{label: i for i, label in enumerate(labels)} for labels in self.labels]
+        combined = np.zeros(len(cube), dtype=np.int64)
+        for radix, codes in zip(self.radix, digits):
+            combined = combined * radix + codes
+        leaf_values, leaf_codes = np.unique(combined, return_inverse=True)
+
+        days = cube['Day'].to_numpy().astype(np.int64)
+        self.day0 = int(days.min()) if len(days) else 0
+        self.span = int(days.max()) - self.day0 + 1 if len(days) else 1
+        offsets = days - self.day0
+        values = cube[METRICS].to_numpy(np.int64)
+
+        # values[level]：该层各节点组合后的编号 (升序)；keys / prefix：(节点, 日) 稀疏日汇总的前缀和
+        self.values, self.keys, self.prefix = [], [], []
+        for cols in HIERARCHY_LEVELS:
+            if cols:
+                level_values, leaf_to_node = np.unique(leaf_values // self._divisor(len(cols)), return_inverse=True)
+                codes = leaf_to_node[leaf_codes]
+            else:
+                level_values, codes = np.zeros(1, dtype=np.int64), np.zeros(len(cube), dtype=np.int64)
+
+            keys = codes * self.span + offsets
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else keys
+            prefix = np.zeros((len(starts) + 1, len(METRICS)), dtype=np.int64)
+            if len(starts):
+                np.cumsum(np.add.reduceat(values[order], starts, axis=0), axis=0, out=prefix[1:])
+
+            self.values.append(level_values)
+            self.keys.append(keys[starts])
+            self.prefix.append(prefix)
+
+        # 各节点的子节点在下一层中的位置区间 [child_bounds[p], child_bounds[p + 1])
+        self.child_bounds = []
+        for level in range(len(HIERARCHY_LEVELS) - 1):
+            width, child_width = len(HIERARCHY_LEVELS[level]), len(HIERARCHY_LEVELS[level + 1])
+            parents = self.values[level + 1] // self._divisor(width, child_width)
+            self.child_bounds.append(np.searchsorted(parents, self.values[level], side='left').tolist()
+                                     + [len(parents)])
+        self._level_of = {len(cols): level for level, cols in enumerate(HIERARCHY_LEVELS)}
+
+    def _divisor(self, width, total=None):
+        """组合编号中第 width 位之后 (到第 total 位为止) 各维度的进制之积"""
+        return int(np.prod(self.radix[width:total], dtype=np.int64))
+
+    def _node(self, path):
+        """(层级, 节点在该层中的位置)，节点不存在时为 (None, None)"""
+        level = self._level_of.get(len(path))
+        if level is None:
+            return None, None
+        value = 0
+        for label, radix, label_codes in zip(path, self.radix, self._label_codes):
+            code = label_codes.get(label)
+            if code is None:
+                return None, None
+            value = value * radix + code
+        pos = int(np.searchsorted(self.values[level], value))
+        if pos == len(self.values[level]) or self.values[level][pos] != value:
+            return None, None
+        return level, pos
+
+    def level(self, path):
+        """节点所在层级 (0 为全部)，节点不存在时为 None"""
+        return self._node(path)[0]
+
+    def is_leaf(self, path):
+        return len(path) == len(HIERARCHY_LEVELS[-1])
+
+    def _offsets(self, start, end):
+        lo = max(day_number(start) - self.day0, 0)
+        hi = min(day_number(end) - self.day0, self.span - 1)
+        return lo, hi
+
+    def _totals(self, level, positions, start, end):
+        lo, hi = self._offsets(start, end)
+        if hi < lo:
+            return np.zeros((len(positions), len(METRICS)), dtype=np.int64)
+        keys, prefix = self.keys[level], self.prefix[level]
+        first = np.searchsorted(keys, positions * self.span + lo, side='left')
+        last = np.searchsorted(keys, positions * self.span + hi, side='right')
+        return prefix[last] - prefix[first]
+
+    def total(self, path, start, end):
+        """节点在 [start, end] 内各指标的合计"""
+        level, pos = self._node(path)
+        return self._totals(level, np.array([pos]), start, end)[0]
+
+    def children(self, path, start, end):
+        """节点的直接子节点在 [start, end] 内的合计：子节点所在层的维度列 + 指标列"""
+        level, pos = self._node(path)
+        lo, hi = self.child_bounds[level][pos], self.child_bounds[level][pos + 1]
+        cols = HIERARCHY_LEVELS[level + 1]
+        node_values = self.values[level + 1][lo:hi]
+        table = pd.DataFrame({
+            col: self.labels[i][node_values // self._divisor(i + 1, len(cols)) % self.radix[i]]
+            for i, col in enumerate(cols)
+        })
+        totals = self._totals(level + 1, np.arange(lo, hi), start, end)
+        for i, metric in enumerate(METRICS):
+            table[metric] = totals[:, i]
+        return table
+
+    def daily(self, path, start, end):
+        """节点在 [start, end] 内每日的合计 (Date + 指标列，只包括有数据的日期)"""
+        level, pos = self._node(path)
+        lo, hi = self._offsets(start, end)
+        keys, prefix = self.keys[level], self.prefix[level]
+        first = np.searchsorted(keys, pos * self.span + lo, side='left')
+        last = np.searchsorted(keys, pos * self.span + hi, side='right') if hi >= lo else first
+        sums = np.diff(prefix[first:last + 1], axis=0)
+        dates = (keys[first:last] - pos * self.span + self.day0).astype('datetime64[D]')
+        table = pd.DataFrame({'Date': pd.to_datetime(dates)})
+        for i, metric in enumerate(METRICS):
+            table[metric] = sums[:, i]
+        return table
+
+
+def get_data_in_range(range_sums, start, end, scope=None):
+    """获取指定日期范围内的数据汇总"""
+    total_consult, total_lead = range_sums.total(start, end, scope)
+    days = (end - start).days + 1
+    days = days if days > 0 else 1
+    return int(total_consult), int(total_lead), days
+
+
+def calc_pct(curr, prev):
+    """计算百分比变化"""
+    if prev == 0:
+        return 0.0 if curr == 0 else 100.0
+    return (curr - prev) / prev * 100
+
+
+def overview_metrics(range_sums, periods):
+    """总览板块的月 / 周 / 日合计、日均及差值
+
+    月度、周度差值为日均差值 (本期日均 - 上期日均)，日度为今日相对昨日的百分比变化。
+    """
+    tm_c, tm_l, tm_days = get_data_in_range(range_sums, *periods['this_month'])
+    lm_c, lm_l, lm_days = get_data_in_range(range_sums, *periods['last_month'])
+    tw_c, tw_l, tw_days = get_data_in_range(range_sums, *periods['this_week'])
+    lw_c, lw_l, lw_days = get_data_in_range(range_sums, *periods['last_week'])
+    t_c, t_l, _ = get_data_in_range(range_sums, *periods['today'])
+    y_c, y_l, _ = get_data_in_range(range_sums, *periods['yesterday'])
+    return {
+        'tm_c': tm_c, 'tm_l': tm_l, 'lm_c': lm_c, 'lm_l': lm_l,
+        'tw_c': tw_c, 'tw_l': tw_l, 'lw_c': lw_c, 'lw_l': lw_l,
+        't_c': t_c, 't_l': t_l, 'y_c': y_c, 'y_l': y_l,
+        'lm_avg_c': lm_c / lm_days, 'lm_avg_l': lm_l / lm_days,
+        'lw_avg_c': lw_c / lw_days, 'lw_avg_l': lw_l / lw_days,
+        'diff_month_c': tm_c / tm_days - lm_c / lm_days,
+        'diff_month_l': tm_l / tm_days - lm_l / lm_days,
+        'diff_week_c': tw_c / tw_days - lw_c / lw_days,
+        'diff_week_l': tw_l / tw_days - lw_l / lw_days,
+        'pct_day_c': calc_pct(t_c, y_c),
+        'pct_day_l': calc_pct(t_l, y_l),
+    }
+
+
+def bots_on_day(cube, day):
+    """某一天各机器人的咨询 / 线索合计，按咨询数降序，只保留有咨询的机器人"""
+    totals = slice_dates(cube, day, day).groupby('BotNoteName')[METRICS].sum().reset_index()
+    totals = totals.sort_values('Consultations', ascending=False)
+    return totals[totals['Consultations'] > 0]
+
+
+def filter_rows(frame, start, end, notenames=None):
+    """取日期区间内 (可选：指定机器人备注名) 的行，frame 可以是原始数据或立方体"""
+    rows = slice_dates(frame, start, end)
+    if notenames is not None:
+        rows = rows[rows['BotNoteName'].isin(notenames)]
+    return rows
+
+
+def daily_trend(cube, start, end=None, notenames=None):
+    """按日聚合的咨询 / 线索趋势 (Date, Consultations, Leads)"""
+    return filter_rows(cube, start, end, notenames).groupby('Date')[METRICS].sum().reset_index()
+
+
+def calculate_group_metrics_table(range_sums, periods):
+    """一次性计算所有 scope (如各小组) 的月/周/日合计及差值，返回以 scope 为索引的表
+
+    periods 需要包含 this_month / last_month / this_week / last_week / today / yesterday
+    六个 (start, end) 区间。月度、周度差值为日均差值，日度差值为今日减昨日。
+    每个区间只做一次前缀和查询，耗时与小组数量基本无关。
+    """
+    totals, days = {}, {}
+    for name, (start, end) in periods.items():
+        totals[name] = range_sums.totals(start, end)
+        days[name] = max(1, (end - start).days + 1)
+
+    def daily_avg(name, metric):
+        return totals[name][:, metric] / days[name]
+
+    table = pd.DataFrame(index=pd.Index(range_sums.scopes))
+    for suffix, metric in (('c', 0), ('l', 1)):
+        table[f'tm_{suffix}'] = totals['this_month'][:, metric].astype(np.int64)
+        table[f'tw_{suffix}'] = totals['this_week'][:, metric].astype(np.int64)
+        table[f't_{suffix}'] = totals['today'][:, metric].astype(np.int64)
+        table[f'delta_month_{suffix}'] = daily_avg('this_month', metric) - daily_avg('last_month', metric)
+        table[f'delta_week_{suffix}'] = daily_avg('this_week', metric) - daily_avg('last_week', metric)
+        table[f'delta_day_{suffix}'] = (totals['today'][:, metric] - totals['yesterday'][:, metric]).astype(np.int64)
+    return table
+
+
+def calculate_daily_avg_change(df, metric_name, curr_days, prev_days):
+    """根据 Curr_/Prev_ 合计列计算日均值、日均差值和百分比变化 (整列向量化)
+
+    上一周期日均为 0 时：当前日均大于 0 记为 100%，否则记为 0%。
+    """
+    curr_avg = df[f'Curr_{metric_name}'].to_numpy(np.float64) / max(1, curr_days)
+    prev_avg = df[f'Prev_{metric_name}'].to_numpy(np.float64) / max(1, prev_days)
+    diff = curr_avg - prev_avg
+
+    pct = np.where(curr_avg > 0, 100.0, 0.0)
+    np.divide(diff * 100, prev_avg, out=pct, where=prev_avg != 0)
+
+    df[f'Curr_Avg_{metric_name}'] = curr_avg
+    df[f'Prev_Avg_{metric_name}'] = prev_avg
+    df[f'Diff_Avg_{metric_name}'] = diff
+    df[f'Pct_Change_{metric_name}'] = pct
+    return df
+
+
+def compare_periods(cube, dimension, current, previous):
+    """按维度对比两个日期区间
+
+    dimension 为列名或列名列表 (如 'Product'、['Group', 'BotNoteName'])；
+    current / previous 为 (start, end)。返回每个维度取值一行，包含两个周期的
+    合计 (Curr_* / Prev_*)、日均、日均差值和百分比变化。任一周期有数据的取值都会出现，
+    另一周期记为 0；维度为空的行不参与对比。
+    """
+    dims = [dimension] if isinstance(dimension, str) else list(dimension)
+    (curr_start, curr_end), (prev_start, prev_end) = current, previous
+
+    window = slice_dates(cube, min(curr_start, prev_start), max(curr_end, prev_end))
+    days = window['Day'].to_numpy()
+    in_curr = (days >= day_number(curr_start)) & (days <= day_number(curr_end))
+    in_prev = (days >= day_number(prev_start)) & (days <= day_number(prev_end))
+
+    parts = {col: window[col] for col in dims}
+    for m in METRICS:
+        values = window[m].to_numpy(np.float64)
+        parts[f'Curr_{m}'] = np.where(in_curr, values, 0.0)
+        parts[f'Prev_{m}'] = np.where(in_prev, values, 0.0)
+    compare = (
+        pd.DataFrame(parts)[in_curr | in_prev]
+        .groupby(dims, sort=True, observed=True)
+        .sum()
+        .reset_index()
+    )
+
+    curr_days = (curr_end - curr_start).days + 1
+    prev_days = (prev_end - prev_start).days + 1
+    for m in METRICS:
+        compare = calculate_daily_avg_change(compare, m, curr_days, prev_days)
+    return compare
+
+
+def compare_children(hierarchy, path, current, previous):
+    """分层汇总中某个节点的各子节点在两个日期区间的对比
+
+    列与 compare_periods 相同 (子节点所在层的维度列、Curr_* / Prev_*、日均、日均差值和
+    百分比变化)，但只读 HierarchyRollup 中的节点合计，不扫描立方体。两个周期都没有数据的
+    子节点不出现。
+    """
+    (curr_start, curr_end), (prev_start, prev_end) = current, previous
+    curr = hierarchy.children(path, curr_start, curr_end)
+    prev = hierarchy.children(path, prev_start, prev_end)
+    compare = curr.drop(columns=METRICS)
+    for m in METRICS:
+        compare[f'Curr_{m}'] = curr[m].astype(np.float64)
+        compare[f'Prev_{m}'] = prev[m].astype(np.float64)
+    active = (curr[METRICS].to_numpy() != 0).any(axis=1) | (prev[METRICS].to_numpy() != 0).any(axis=1)
+    compare = compare[active].reset_index(drop=True)
+
+    curr_days = (curr_end - curr_start).days + 1
+    prev_days = (prev_end - prev_start).days + 1
+    for m in METRICS:
+        compare = calculate_daily_avg_change(compare, m, curr_days, prev_days)
+    return compare
+
+def build_leaderboard(compare, metric, k=10, by='pct', scope=None):
+    """机器人涨跌榜：每个 scope 内日均上升 / 下降最多的前 k 名
+
+    compare 为 compare_periods 的结果。by='pct' 按百分比变化排名，by='abs' 按日均差值排名；
+    只有日均差值大于 0 的进入上升榜、小于 0 的进入下降榜，名次相同时按 compare 中的顺序。
+    scope 为分榜的列 (如 'Group'、'Product')，为空时为全局榜。全部榜单用一次 lexsort
+    排好 (scope → 方向 → 名次)，再按各榜单的起始位置截取前 k 名，不逐个 scope 循环。
+    返回按 scope、Direction ('up' / 'down')、Rank 排列的表，保留 compare 的所有列。
+    """
+    value_col = f'Pct_Change_{metric}' if by == 'pct' else f'Diff_Avg_{metric}'
+    diff = compare[f'Diff_Avg_{metric}'].to_numpy(np.float64)
+    values = compare[value_col].to_numpy(np.float64)
+
+    if scope is None:
+        codes = np.zeros(len(compare), dtype=np.intp)
+    else:
+        codes, _ = pd.factorize(compare[scope], sort=True)
+
+    # 方向 0 为上升榜 (值越大越靠前)、1 为下降榜 (值越小越靠前)；scope 为空的行不上榜
+    rows = np.flatnonzero((diff != 0) & (codes >= 0))
+    down = (diff[rows] < 0).astype(np.intp)
+    keys = np.where(down == 1, values[rows], -values[rows])
+    # lexsort 是稳定排序，最后一个键为主键；名次相同的按行号 (rows 本身升序) 排列
+    order = np.lexsort((keys, down, codes[rows]))
+    rows, down = rows[order], down[order]
+    board_ids = codes[rows] * 2 + down
+    ranks = np.arange(len(rows)) - np.searchsorted(board_ids, board_ids, side='left') + 1
+    keep = ranks <= k
+
+    board = compare.iloc[rows[keep]].reset_index(drop=True)
+    board.insert(0, 'Direction', np.where(down[keep] == 1, 'down', 'up').astype(object))
+    board.insert(1, 'Rank', ranks[keep])
+    return board
+
+
+def leaderboard_table(board, metric, direction):
+    """涨跌榜中某个方向的展示表 (页面和静态快照共用的列名)"""
+    ranked = board[board['Direction'] == direction]
+    return pd.DataFrame({
+        '排名': ranked['Rank'],
+        'Bot': ranked['BotNoteName'],
+        '日均变化 (%)': ranked[f'Pct_Change_{metric}'].round(1),
+        '日均差值': ranked[f'Diff_Avg_{metric}'].round(1),
+        '本周日均': ranked[f'Curr_Avg_{metric}'].round(1),
+        '上周日均': ranked[f'Prev_Avg_{metric}'].round(1),
+    })
+
+
+def build_dashboard_aggregates(df, leaderboard_size=10):
+    """一次性构建看板用到的全部派生数据 (每个数据版本只算一次)
+
+    以数据中的最新日期作为"今天"。返回 dict：立方体、各对比周期、全局 / 各小组前缀和、
+    小组核心指标、小组 × Bot 周度对比、各指标的小组涨跌榜、机器人备注名列表和
+    产品 → 小组 → Bot 分层汇总。
+    """
+    cube = build_rollup_cube(df)
+    periods = reporting_periods(cube['Date'].iloc[-1].date())
+    group_range_sums = RangeSums(cube, 'Group')
+    compare = compare_periods(cube, ['Group', 'BotNoteName'], *(periods[name] for name in PERIOD_PAIRS['week']))
+    return {
+        'cube': cube,
+        'periods': periods,
+        'min_date': cube['Date'].iloc[0].date(),
+        'range_sums': RangeSums(cube),
+        'group_range_sums': group_range_sums,
+        'group_metrics': calculate_group_metrics_table(group_range_sums, periods).to_dict('index'),
+        'compare': compare,
+        'boards': {m: build_leaderboard(compare, m, k=leaderboard_size, scope='Group') for m in METRICS},
+        'notenames': sorted(cube['BotNoteName'].dropna().unique().tolist()),
+        'hierarchy': HierarchyRollup(cube),
+    }
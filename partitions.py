@@ -0,0 +1,150 @@
+"""按月分区存档：近期月份常驻内存，更早的月份写入本地 Parquet，按需加载 (不依赖 Streamlit)"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_loader import concat_frames
+from query_cache import QueryCache
+
+
+def month_numbers(days):
+    """整数日序号数组转月序号 (距 1970-01 的月数)"""
+    return np.asarray(days).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def month_start_day(month):
+    """月序号对应月份第一天的日序号"""
+    return int(np.datetime64(int(month), 'M').astype('datetime64[D]').astype(np.int64))
+
+
+def month_name(month):
+    return str(np.datetime64(int(month), 'M'))
+
+
+def hot_cutoff_day(latest_day, hot_months):
+    """最近 hot_months 个自然月 (含 latest_day 所在月) 的第一天"""
+    return month_start_day(month_numbers([latest_day])[0] - (hot_months - 1))
+
+
+def frame_digest(df):
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:12]
+
+
+class MonthArchive:
+    """一个数据部分 (工作表 / 文件) 的冷月份存档
+
+    每个月一个 Parquet 文件，manifest.json 记录各月的内容哈希、行数、日期范围和
+    机器人备注名，不读数据文件就能知道最早日期和全部机器人。读取的月份放进 cache
+    (按估算内存大小淘汰的 QueryCache，可在多个存档间共用)，超出预算的最久未用月份被释放。
+    """
+
+    def __init__(self, directory, cache=None):
+        self.directory = directory
+        self.cache = cache or QueryCache(max_entries=1024, max_bytes=256 * 1024 * 1024)
+        self._lock = threading.Lock()
+        self.manifest = self._read_manifest()
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, 'manifest.json')
+
+    def _month_path(self, name):
+        return os.path.join(self.directory, f'{name}.parquet')
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path(), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # 数据文件丢失的月份视为没有存档
+        return {name: info for name, info in manifest.items() if os.path.exists(self._month_path(name))}
+
+    def _write_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f'{self._manifest_path()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self._manifest_path())
+
+    def months(self):
+        return sorted(self.manifest)
+
+    def store(self, df, replace=False):
+        """把 df 的行按月写入存档
+
+        replace 为 False 时与已存档的同月数据合并 (增量追加进来的补录行)；为 True 时
+        df 就是冷数据的全部内容 (全量重新加载之后)，df 中没有的已存档月份一并删除。
+        内容没有变化的月份不重写文件。
+        """
+        with self._lock:
+            months = month_numbers(df['Day'].to_numpy()) if not df.empty else np.array([], dtype=np.int64)
+            names = set()
+            for month in np.unique(months):
+                name = month_name(month)
+                names.add(name)
+                rows = df[months == month]
+                if not replace and name in self.manifest:
+                    rows = concat_frames([self._load(name), rows]).sort_values('Date', ascending=True, kind='stable')
+                self._write_month(name, rows.reset_index(drop=True))
+            if replace:
+                for name in set(self.manifest) - names:
+                    del self.manifest[name]
+                    try:
+                        os.remove(self._month_path(name))
+                    except OSError:
+                        pass
+            self._write_manifest()
+
+    def _write_month(self, name, rows):
+        digest = frame_digest(rows)
+        if self.manifest.get(name, {}).get('hash') == digest:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._month_path(name)
+        rows.to_parquet(f'{path}.tmp', index=False)
+        os.replace(f'{path}.tmp', path)
+        days = rows['Day'].to_numpy()
+        self.manifest[name] = {
+            'hash': digest,
+            'rows': len(rows),
+            'min_day': int(days.min()),
+            'max_day': int(days.max()),
+            'notenames': sorted(rows['BotNoteName'].dropna().astype(str).unique().tolist()),
+        }
+
+    def _load(self, name):
+        info = self.manifest[name]
+        path = self._month_path(name)
+        return self.cache.get_or_compute((path, info['hash']), lambda: pd.read_parquet(path))
+
+    def load_range(self, lo_day, hi_day, months=None):
+        """[lo_day, hi_day] 内的存档行 (按日期排序)，只读取涉及到的月份
+
+        months 不为 None 时只读取其中的月份 (之后才存档的月份不读)。
+        """
+        with self._lock:
+            names = [name for name, info in sorted(self.manifest.items())
+                     if (months is None or name in months)
+                     and info['max_day'] >= lo_day and info['min_day'] <= hi_day]
+            frames = [self._load(name) for name in names]
+        if not frames:
+            return None
+        df = concat_frames(frames) if len(frames) > 1 else frames[0]
+        days = df['Day'].to_numpy()
+        lo = np.searchsorted(days, lo_day, side='left')
+        hi = np.searchsorted(days, hi_day, side='right')
+        return df.iloc[lo:hi]
+
+    def min_day(self):
+        return min((info['min_day'] for info in self.manifest.values()), default=None)
+
+    def notenames(self):
+        names = set()
+        for info in self.manifest.values():
+            names.update(info['notenames'])
+        return names
@@ -0,0 +1,288 @@
+"""静态快照发布：把看板的只读板块按数据版本渲染成静态 HTML / JSON (不依赖 Streamlit)
+
+总览指标、今日机器人柱状图、当月总趋势和各小组指标 / 涨跌榜，与页面使用同一份数据包和
+同一批图表构建函数，每个数据版本只渲染一次。发布目录交给任意静态文件服务 (nginx、对象存储等)，
+只看数据的用户打开静态页面即可，不再各自运行一遍 app.py；需要筛选趋势、下钻或查看源数据时
+才进入实时看板。
+
+发布目录结构：
+    index.html / data.json          最新数据版本的页面和结构化数据
+    versions/<数据版本>/             最近 keep 个数据版本 (同样的两个文件)
+    plotly-<版本号>.min.js           所有页面共用的 plotly.js，只写一次，可长期缓存
+"""
+import datetime
+import html
+import json
+import os
+import shutil
+
+import numpy as np
+import plotly
+import plotly.io as pio
+
+from charts import DEFAULT_MAX_POINTS, build_month_trend_figure, build_today_bar_figure
+from metrics import bots_on_day, daily_trend, leaderboard_table, overview_metrics
+
+METRIC_NAMES = {'Consultations': '咨询', 'Leads': '线索'}
+
+PAGE_CSS = """
+body { font-family: -apple-system, "Segoe UI", "PingFang SC", "Microsoft YaHei", sans-serif; margin: 0 auto;
+       max-width: 1400px; padding: 1.5rem 2rem; color: #262730; }
+h2 { margin-top: 2rem; } hr { border: none; border-top: 1px solid #ddd; margin: 2rem 0; }
+.caption { color: #808495; font-size: 0.9rem; }
+.info { background: #e8f2fc; color: #0054a3; padding: 0.8rem 1rem; border-radius: 0.5rem; }
+.cards { display: grid; grid-template-columns: repeat(var(--cols), minmax(0, 1fr)); gap: 1rem; margin: 0.5rem 0 1rem; }
+.card .label { font-size: 0.875rem; } .card .value { font-size: 2rem; margin: 0.2rem 0; }
+.card .delta { display: inline-block; font-size: 0.875rem; padding: 0.1rem 0.5rem; border-radius: 1rem; }
+.delta.up { color: #09ab3b; background: #e6f6eb; } .delta.down { color: #ff2b2b; background: #ffecec; }
+.delta.off { color: #808495; background: #f0f2f6; }
+.box { border: 1px solid #ddd; padding: 10px; border-radius: 5px; margin-bottom: 15px; }
+.tables { display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; }
+table { border-collapse: collapse; font-size: 0.875rem; width: 100%; }
+th, td { border: 1px solid #e6e9ef; padding: 0.25rem 0.5rem; text-align: right; }
+th { background: #f0f2f6; } td:nth-child(2) { text-align: left; }
+.tabs > input { display: none; }
+.tabs > label { display: inline-block; padding: 0.5rem 1rem; cursor: pointer; border-bottom: 2px solid transparent; }
+.tabs > input:checked + label { color: #ff4b4b; border-bottom-color: #ff4b4b; }
+.tabs > .panel { display: none; border-top: 1px solid #ddd; padding-top: 1rem; }
+"""
+
+
+def json_default(value):
+    """numpy 标量和日期转成 JSON 可以表示的值"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f'无法序列化 {type(value).__name__}')
+
+
+def overview_cards(ov, periods):
+    """总览板块的三行指标卡片 [(标题, [(名称, 数值, 变化, 颜色)])]，与页面第 4 节一致"""
+    y_str = periods['yesterday'][0].strftime('%m-%d')
+    t_str = periods['today'][0].strftime('%m-%d')
+    return [
+        ('📅 月度概览', [
+            ('上月总咨询数', f"{ov['lm_c']:,}", f"日均 {ov['lm_avg_c']:.1f}", 'off'),
+            ('上月总线索数', f"{ov['lm_l']:,}", f"日均 {ov['lm_avg_l']:.1f}", 'off'),
+            ('本月总咨询数', f"{ov['tm_c']:,}", f"{ov['diff_month_c']:+.1f} (日均差值)", 'normal'),
+            ('本月总线索数', f"{ov['tm_l']:,}", f"{ov['diff_month_l']:+.1f} (日均差值)", 'normal'),
+        ]),
+        ('🗓️ 周度概览 (周一到周日)', [
+            ('上周咨询数', f"{ov['lw_c']:,}", f"日均 {ov['lw_avg_c']:.1f}", 'off'),
+            ('上周线索数', f"{ov['lw_l']:,}", f"日均 {ov['lw_avg_l']:.1f}", 'off'),
+            ('本周咨询数', f"{ov['tw_c']:,}", f"{ov['diff_week_c']:+.1f} (日均差值)", 'normal'),
+            ('本周线索数', f"{ov['tw_l']:,}", f"{ov['diff_week_l']:+.1f} (日均差值)", 'normal'),
+        ]),
+        ('⏰ 日度概览', [
+            (f'昨日咨询数 ({y_str})', f"{ov['y_c']:,}", None, 'off'),
+            (f'昨日线索数 ({y_str})', f"{ov['y_l']:,}", None, 'off'),
+            (f'今日咨询数 ({t_str})', f"{ov['t_c']:,}", f"{ov['pct_day_c']:.1f}% vs 昨日", 'normal'),
+            (f'今日线索数 ({t_str})', f"{ov['t_l']:,}", f"{ov['pct_day_l']:.1f}% vs 昨日", 'normal'),
+        ]),
+    ]
+
+
+def group_cards(metrics):
+    """小组核心指标卡片，与页面第 7 节一致 (月 / 周为日均差值，日为相对昨日的差值)"""
+    return [
+        ('本月总咨询', f"{metrics['tm_c']:,}", f"{metrics['delta_month_c']:+.1f} (日均差值)", 'normal'),
+        ('本月总线索', f"{metrics['tm_l']:,}", f"{metrics['delta_month_l']:+.1f} (日均差值)", 'normal'),
+        ('本周咨询', f"{metrics['tw_c']:,}", f"{metrics['delta_week_c']:+.1f} (日均差值)", 'normal'),
+        ('本周线索', f"{metrics['tw_l']:,}", f"{metrics['delta_week_l']:+.1f} (日均差值)", 'normal'),
+        ('今日咨询', f"{metrics['t_c']:,}", f"{int(metrics['delta_day_c']):+d} vs 昨日", 'normal'),
+        ('今日线索', f"{metrics['t_l']:,}", f"{int(metrics['delta_day_l']):+d} vs 昨日", 'normal'),
+    ]
+
+
+def top_bot_card(board, metric, direction):
+    """涨跌榜第一名的卡片 (没有上升 / 下降的 Bot 时为 None)"""
+    top = board[(board['Direction'] == direction) & (board['Rank'] == 1)]
+    if top.empty:
+        return None
+    row = top.iloc[0]
+    label = '⬆️ 日均上升最多 Bot' if direction == 'up' else '🔻 日均下降最多 Bot'
+    delta = f"{row[f'Pct_Change_{metric}']:+.1f}% ({row[f'Diff_Avg_{metric}']:+.1f}次/日)"
+    return (label, f"Bot: {row['BotNoteName']}", delta, 'normal')
+
+
+def snapshot_data(bundle, groups, leaderboard_size=10, max_points=DEFAULT_MAX_POINTS):
+    """从数据包取出只读板块的全部内容：(可写成 JSON 的 dict, {图表名: plotly Figure})"""
+    cube, periods = bundle['cube'], bundle['periods']
+    month_start, today = periods['this_month']
+    ov = overview_metrics(bundle['range_sums'], periods)
+    bots_today = bots_on_day(cube, today)
+    month_trend = daily_trend(cube, month_start)
+
+    figures = {}
+    if not bots_today.empty:
+        figures['today_bar'] = build_today_bar_figure(bots_today, today)
+    if not month_trend.empty:
+        figures['month_trend'] = build_month_trend_figure(month_trend, month_start, max_points=max_points)
+
+    present_groups = set(cube['Group'].dropna().unique())
+    group_data = {}
+    for group in (g for g in groups if g in present_groups):
+        boards = {metric: board[board['Group'] == group] for metric, board in bundle['boards'].items()}
+        group_data[group] = {
+            'metrics': bundle['group_metrics'][group],
+            'cards': group_cards(bundle['group_metrics'][group]),
+            'top_bots': {metric: {direction: top_bot_card(board, metric, direction) for direction in ('down', 'up')}
+                         for metric, board in boards.items()},
+            'leaderboards': {metric: {direction: leaderboard_table(board, metric, direction).to_dict('records')
+                                      for direction in ('up', 'down')}
+                             for metric, board in boards.items()},
+        }
+
+    data = {
+        'version': bundle['version'],
+        'updated_to': today,
+        'published_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'leaderboard_size': leaderboard_size,
+        'overview': ov,
+        'overview_cards': overview_cards(ov, periods),
+        'today_bots': bots_today.to_dict('records'),
+        'month_trend': month_trend.assign(Date=month_trend['Date'].dt.strftime('%Y-%m-%d')).to_dict('records'),
+        'groups': group_data,
+        'figures': {name: json.loads(fig.to_json()) for name, fig in figures.items()},
+    }
+    return data, figures
+
+
+def render_cards(cards):
+    items = []
+    for label, value, delta, color in cards:
+        delta_html = ''
+        if delta is not None:
+            kind = 'off' if color == 'off' else ('down' if delta.startswith('-') else 'up')
+            arrow = '↓' if delta.startswith('-') else '↑'
+            delta_html = f'<div class="delta {kind}">{arrow} {html.escape(delta)}</div>'
+        items.append(f'<div class="card"><div class="label">{html.escape(label)}</div>'
+                     f'<div class="value">{html.escape(value)}</div>{delta_html}</div>')
+    return f'<div class="cards" style="--cols: {len(cards)}">{"".join(items)}</div>'
+
+
+def render_figure(fig):
+    return pio.to_html(fig, include_plotlyjs=False, full_html=False, default_width='100%', default_height='450px',
+                       config={'responsive': True})
+
+
+def render_table(records):
+    if not records:
+        return '<p class="caption">暂无</p>'
+    header = ''.join(f'<th>{html.escape(str(name))}</th>' for name in records[0])
+    rows = ''.join('<tr>' + ''.join(f'<td>{html.escape(str(value))}</td>' for value in record.values()) + '</tr>'
+                   for record in records)
+    return f'<table><thead><tr>{header}</tr></thead><tbody>{rows}</tbody></table>'
+
+
+def render_group_panel(group, leaderboard_size):
+    """单个小组的核心指标和 Bot 涨跌榜 (排版与页面第 7 节一致)"""
+    parts = [render_cards(group['cards']), '<hr>', '<h5>📈 本周日均涨跌排名 (Bot)</h5>',
+             '<p class="caption">ℹ️ <b>对比周期：</b>本周日均 vs 上周日均 (已进行时间标准化)</p>']
+    for metric, title in (('Consultations', '🗣️ 咨询数变化'), ('Leads', '🔗 线索数变化')):
+        name = METRIC_NAMES[metric]
+        cards = []
+        for direction, word in (('down', '下降'), ('up', '上升')):
+            card = group['top_bots'][metric][direction]
+            cards.append(render_cards([card]) if card is not None else f'<div class="info">日均无{name}{word}的 Bot</div>')
+        boards = group['leaderboards'][metric]
+        parts.append(
+            f'<div class="box"><h6>{title}</h6><div class="tables">{"".join(cards)}</div>'
+            f'<details><summary>📋 {name}涨跌榜 (前 {leaderboard_size} 名)</summary><div class="tables">'
+            f'<div><p class="caption">⬆️ 上升榜</p>{render_table(boards["up"])}</div>'
+            f'<div><p class="caption">🔻 下降榜</p>{render_table(boards["down"])}</div></div></details></div>'
+        )
+    return ''.join(parts)
+
+
+def render_page(data, figure_html, plotly_src):
+    """只读板块的完整 HTML 页面；figure_html 为 {图表名: render_figure 结果}，plotly.js 通过 plotly_src 引用"""
+    updated_to = data['updated_to']
+    parts = ['<h1>🚀 TG BOT数据看板</h1>',
+             f'<p><b>数据更新至：{updated_to}</b>　·　数据版本 <code>{html.escape(data["version"])}</code>'
+             f'　·　静态快照，发布于 {data["published_at"].replace("T", " ")}</p>',
+             '<h2>📊 核心数据指标 (总览)</h2>']
+    for title, cards in data['overview_cards']:
+        parts.append(f'<h5>{title}</h5>{render_cards(cards)}')
+
+    parts.append('<hr><h2>🤖 今日机器人表现</h2>')
+    if 'today_bar' in figure_html:
+        parts.append(figure_html['today_bar'])
+    else:
+        parts.append(f'<div class="info">今日 ({updated_to}) 暂无机器人咨询数据。</div>')
+
+    parts.append('<hr><h2>📈 当月总趋势</h2>')
+    if 'month_trend' in figure_html:
+        parts.append(figure_html['month_trend'])
+    else:
+        parts.append('<div class="info">当月暂无数据。</div>')
+
+    parts.append('<hr><h2>🏢 各小组核心数据指标</h2>')
+    groups = data['groups']
+    if groups:
+        # 纯 CSS 的 tab：每个小组一个单选按钮，选中的按钮显示对应面板
+        tabs, panels, rules = [], [], []
+        for i, (name, group) in enumerate(groups.items()):
+            checked = ' checked' if i == 0 else ''
+            tabs.append(f'<input type="radio" name="group-tab" id="group-tab-{i}"{checked}>'
+                        f'<label for="group-tab-{i}">{html.escape(name)}</label>')
+            panels.append(f'<div class="panel" id="group-panel-{i}">'
+                          f'{render_group_panel(group, data["leaderboard_size"])}</div>')
+            rules.append(f'#group-tab-{i}:checked ~ #group-panel-{i} {{ display: block; }}')
+        parts.append(f'<style>{" ".join(rules)}</style><div class="tabs">{"".join(tabs)}{"".join(panels)}</div>')
+    else:
+        parts.append('<div class="info">当前数据集中未找到指定小组数据。</div>')
+
+    return (f'<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8">'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+            f'<title>TG BOT数据看板 · {updated_to}</title><style>{PAGE_CSS}</style>'
+            f'<script src="{plotly_src}"></script></head><body>{"".join(parts)}</body></html>')
+
+
+def write_text(path, text):
+    """先写临时文件再替换，静态服务读到的总是完整文件"""
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(f'{path}.tmp', path)
+
+
+def published_version(out_dir):
+    """发布目录中最新快照的数据版本 (还没有发布过时为 None)"""
+    try:
+        with open(os.path.join(out_dir, 'data.json'), encoding='utf-8') as f:
+            return json.load(f).get('version')
+    except (OSError, ValueError):
+        return None
+
+
+def publish_snapshot(bundle, out_dir, groups, leaderboard_size=10, max_points=DEFAULT_MAX_POINTS, keep=5):
+    """把数据包的只读板块发布到 out_dir，返回本次发布的版本目录
+
+    out_dir 中最新快照已是这个数据版本时 (例如多个副本共用发布目录、或进程重启后从
+    本地快照恢复) 不重复渲染。先写好版本目录，再替换根目录的 index.html / data.json，
+    最后只保留最近 keep 个版本目录。
+    """
+    version_dir = os.path.join(out_dir, 'versions', bundle['version'])
+    if published_version(out_dir) == bundle['version'] and os.path.isdir(version_dir):
+        return version_dir
+
+    os.makedirs(version_dir, exist_ok=True)
+    plotly_js = f'plotly-{plotly.__version__}.min.js'
+    if not os.path.exists(os.path.join(out_dir, plotly_js)):
+        write_text(os.path.join(out_dir, plotly_js), plotly.offline.get_plotlyjs())
+
+    data, figures = snapshot_data(bundle, groups, leaderboard_size=leaderboard_size, max_points=max_points)
+    data_json = json.dumps(data, ensure_ascii=False, default=json_default)
+    figure_html = {name: render_figure(fig) for name, fig in figures.items()}
+    write_text(os.path.join(version_dir, 'data.json'), data_json)
+    write_text(os.path.join(version_dir, 'index.html'), render_page(data, figure_html, f'../../{plotly_js}'))
+    write_text(os.path.join(out_dir, 'data.json'), data_json)
+    write_text(os.path.join(out_dir, 'index.html'), render_page(data, figure_html, plotly_js))
+
+    versions_root = os.path.join(out_dir, 'versions')
+    versions = sorted(os.listdir(versions_root), key=lambda name: os.path.getmtime(os.path.join(versions_root, name)))
+    for name in versions[:-keep] if keep else []:
+        if name != bundle['version']:
+            shutil.rmtree(os.path.join(versions_root, name), ignore_errors=True)
+    return version_dir
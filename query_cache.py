@@ -0,0 +1,90 @@
+"""进程内共享的查询结果缓存 (不依赖 Streamlit)"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def estimate_size(value):
+    """估算缓存值占用的字节数"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum()) if isinstance(value, pd.DataFrame) else int(usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return 0
+
+
+class QueryCache:
+    """LRU 查询缓存，同时按条目数和估算内存大小淘汰
+
+    所有会话共用同一份结果，调用方只能读取、不能原地修改返回的对象。
+    key 由调用方给出，第一个元素为数据版本，其余为规范化后的筛选条件。
+    """
+
+    def __init__(self, max_entries=64, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.version = None  # 最近一次 retain_version 的数据版本
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """命中时直接返回缓存结果，否则调用 compute() 计算并写入缓存
+
+        计算期间数据版本已经换掉 (retain_version 之后) 的旧版本结果只返回、不写入缓存，
+        否则它会一直占着位置，直到被 LRU 淘汰。
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = compute()
+        size = estimate_size(value)
+        with self._lock:
+            if self.version is not None and key[0] != self.version:
+                return value
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            # 至少保留刚写入的这一条
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def retain_version(self, version):
+        """数据版本变化时丢弃其他版本的结果 (同一版本重复调用不做任何事)"""
+        with self._lock:
+            if version == self.version:
+                return
+            self.version = version
+            for key in [key for key in self._entries if key[0] != version]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
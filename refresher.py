@@ -0,0 +1,109 @@
+"""后台定时刷新 (不依赖 Streamlit)"""
+import datetime
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """后台定时刷新数据并重建派生数据 (stale-while-revalidate)
+
+    刷新在后台线程中进行，期间页面继续使用上一份数据包；新数据和全部派生结果
+    构建完成后才整体替换 current()，因此读到的永远是同一版本的完整数据包。
+    数据版本 (原始内容的哈希) 没有变化时不重建派生数据。刷新失败时保留旧数据，按 retry_interval 重试。
+
+    loader 为 MultiSourceLoader；build(df) 返回派生数据 dict，会合并进数据包。
+    on_update(bundle) 在刷新线程中、新数据包替换 current() 之后调用，每个数据版本一次
+    (如发布静态快照)：它慢不会推迟新数据生效和冷启动，失败只记录日志，不影响刷新。
+    从本地快照恢复的数据包要等第一次刷新后仍是当前数据时才调用。
+    """
+
+    def __init__(self, loader, build, interval=1800, retry_interval=60, on_update=None):
+        self.loader = loader
+        self.build = build
+        self.on_update = on_update
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.last_refresh_at = None       # 最近一次成功刷新的完成时间
+        self.last_refresh_seconds = None  # 最近一次成功刷新的耗时 (拉取 + 清洗 + 派生)
+        self.last_timings = {}            # 最近一次成功刷新各步骤耗时 (fetch / clean / merge / build)
+        self.last_error = None
+        self._bundle = None
+        self._updated_version = None  # 最近一次调用 on_update 的数据版本
+        self._attempted = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # 本地快照已恢复数据时，先用它构建数据包，页面无需等待网络
+        if loader.loaded:
+            self._bundle = self._build_bundle(loader.data_version, loader.df)
+
+    def _build_bundle(self, data_version, df):
+        bundle = {'version': data_version, 'df': df, 'from_snapshot': self.loader.from_snapshot}
+        if not df.empty:
+            bundle.update(self.build(df))
+        return bundle
+
+    def _notify_update(self):
+        """为当前数据包调用 on_update (同一数据版本只调用一次)"""
+        bundle = self._bundle
+        if (self.on_update is None or bundle is None or bundle['df'].empty
+                or bundle['version'] == self._updated_version):
+            return
+        self._updated_version = bundle['version']
+        try:
+            self.on_update(bundle)
+        except Exception as e:
+            logger.warning('数据版本 %s 的更新回调失败: %s', bundle['version'], e)
+
+    def current(self):
+        """当前数据包 (首次加载完成前且没有快照时为 None)"""
+        return self._bundle
+
+    def refresh_now(self):
+        """立即刷新一次 (同一时间只有一个刷新在进行)"""
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                data_version, df = self.loader.refresh()
+                timings = dict(self.loader.last_timings)
+                bundle = self._bundle
+                build_started = time.perf_counter()
+                if bundle is None or bundle['version'] != data_version:
+                    self._bundle = self._build_bundle(data_version, df)
+                elif bundle['from_snapshot']:
+                    # 快照内容与 Sheets 一致：派生数据不用重算，只更新来源标记
+                    self._bundle = {**bundle, 'from_snapshot': False}
+                timings['build'] = time.perf_counter() - build_started
+                self.last_timings = timings
+                self.last_refresh_at = datetime.datetime.now()
+                self.last_refresh_seconds = time.perf_counter() - started
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                logger.warning('刷新 Google Sheets 数据失败: %s', e)
+            finally:
+                self._attempted.set()
+
+    def wait_for_first_attempt(self, timeout=None):
+        """等待第一次刷新结束 (无论成功与否)"""
+        return self._attempted.wait(timeout)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='data-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            self.refresh_now()
+            self._notify_update()
+            wait = self.retry_interval if self.last_error is not None else self.interval
+            if self._stop.wait(wait):
+                return
@@ -0,0 +1,73 @@
+"""源数据分页查看与分块导出 (不依赖 Streamlit)"""
+import codecs
+import tempfile
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def view_positions(frame, sort_column=None, ascending=True, search_column=None, search_text=''):
+    """按搜索条件过滤、按列排序后的行位置数组
+
+    结果只依赖筛选条件，可缓存后在翻页时反复使用，不必每次 rerun 都重新排序整个表。
+    列本身已按要求的方向有序时 (如按日期升序) 直接跳过排序。
+    """
+    positions = np.arange(len(frame))
+    if search_text and search_column:
+        matched = frame[search_column].astype(str).str.contains(search_text, case=False, regex=False, na=False)
+        positions = positions[matched.to_numpy()]
+
+    if sort_column:
+        values = frame[sort_column].iloc[positions].reset_index(drop=True)
+        already_sorted = values.is_monotonic_increasing if ascending else values.is_monotonic_decreasing
+        if not already_sorted:
+            order = values.sort_values(ascending=ascending, kind='stable', na_position='last').index
+            positions = positions[order.to_numpy()]
+    return positions
+
+
+def page_count(n_rows, page_size):
+    return max(1, -(-n_rows // page_size))
+
+
+def page_slice(frame, positions, page, page_size):
+    """取第 page 页 (从 1 开始) 的行"""
+    start = (page - 1) * page_size
+    return frame.iloc[positions[start:start + page_size]]
+
+
+def _iter_chunks(frame, positions, chunk_rows):
+    for start in range(0, len(positions), chunk_rows):
+        yield start, frame.iloc[positions[start:start + chunk_rows]]
+
+
+def write_csv(frame, positions, fileobj, chunk_rows=50_000):
+    """逐块写出 CSV (UTF-8 BOM，Excel 可直接打开)"""
+    fileobj.write(codecs.BOM_UTF8)
+    for start, chunk in _iter_chunks(frame, positions, chunk_rows):
+        chunk.to_csv(fileobj, index=False, header=(start == 0), encoding='utf-8')
+    if len(positions) == 0:
+        frame.iloc[:0].to_csv(fileobj, index=False, encoding='utf-8')
+
+
+def write_parquet(frame, positions, fileobj, chunk_rows=50_000):
+    """逐块写出 Parquet，每块一个 row group"""
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        for _, chunk in _iter_chunks(frame, positions, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def export_file(frame, positions, fmt='csv', chunk_rows=50_000):
+    """按 positions 顺序分块导出到临时文件，返回已回到开头的文件对象
+
+    内存中同时只有一块数据的编码结果，不会先拼出整份 CSV / Parquet。
+    """
+    fileobj = tempfile.TemporaryFile()
+    if fmt == 'parquet':
+        write_parquet(frame, positions, fileobj, chunk_rows)
+    else:
+        write_csv(frame, positions, fileobj, chunk_rows)
+    fileobj.seek(0)
+    return fileobj
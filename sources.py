@@ -0,0 +1,350 @@
+"""数据来源：Google Sheets 表格与本地导出文件 (不依赖 Streamlit)
+
+每个来源提供同样的接口，由 data_loader.MultiSourceLoader 并发刷新、合并：
+
+- refresh()：拉取最新数据，返回 ({来源名称: 异常}, 成功的部分数, 拉取耗时, 清洗耗时)，
+  单个工作表 / 文件失败只记在返回的异常里，不影响同一来源的其他部分；
+- frames()：[(来源名称, 数据版本, 清洗后的 DataFrame)]，只包含已有数据的部分；
+- load_snapshot()：从本地快照恢复，恢复了任何数据时返回 True；loaded：是否已有数据；
+- archive_before(day) / view() / history()：较早月份移入冷存档，各部分的
+  (df, 冷存档, 已存档月份) 视图 (按日期区间读取时使用) 以及最早日期和全部机器人备注名
+  (见 partitions.py)。
+"""
+import glob
+import hashlib
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from data_loader import (
+    IncrementalSheetLoader, archive_cold_rows, clean_data, concat_frames, frame_view, history_of,
+)
+from partitions import MonthArchive
+
+
+def a1_range(title, cells=None):
+    """带工作表名的 A1 区间；cells 为 None 时表示整张工作表"""
+    quoted = "'" + title.replace("'", "''") + "'"
+    return f'{quoted}!{cells}' if cells else quoted
+
+
+def source_label(key, worksheet):
+    """Sheets 工作表在提示信息中的名称"""
+    return f"{key[:8]}…/{worksheet or '第一个工作表'}"
+
+
+class GoogleSheetsSource:
+    """一个 Google Sheets 表格中的若干工作表
+
+    worksheets 为工作表名列表，省略或为 None 时读取第一个工作表。每个工作表各有一个
+    IncrementalSheetLoader (各自增量加载、各自的本地快照)，全部工作表用一次
+    values_batch_get 读取。open_client() 返回 gspread 客户端，首次刷新时创建并复用。
+    指定 snapshot_dir 时快照和冷存档都放在该目录下。
+    """
+
+    def __init__(self, key, open_client, worksheets=None, snapshot_dir=None, cold_cache=None):
+        self.key = key
+        self.open_client = open_client
+        self.worksheets = list(worksheets or [None])
+        self.loaders = {}
+        for worksheet in self.worksheets:
+            snapshot_path, archive = None, None
+            if snapshot_dir:
+                name = f'{key}__' + re.sub(r'[^\w.-]', '_', worksheet or 'sheet1')
+                snapshot_path = os.path.join(snapshot_dir, f'{name}.arrow')
+                archive = MonthArchive(os.path.join(snapshot_dir, 'partitions', name), cold_cache)
+            self.loaders[worksheet] = IncrementalSheetLoader(snapshot_path=snapshot_path, archive=archive)
+        self._client = None
+
+    @property
+    def loaded(self):
+        return any(loader.header is not None for loader in self.loaders.values())
+
+    def load_snapshot(self):
+        restored = [loader.load_snapshot() for loader in self.loaders.values()]
+        return any(restored)
+
+    def frames(self):
+        return [(source_label(self.key, worksheet), loader.data_version, loader.df)
+                for worksheet, loader in self.loaders.items() if loader.header is not None]
+
+    def archive_before(self, cutoff_day):
+        for loader in self.loaders.values():
+            loader.archive_before(cutoff_day)
+
+    def view(self):
+        return [loader.view() for loader in self.loaders.values()]
+
+    def history(self):
+        return [loader.history() for loader in self.loaders.values()]
+
+    def refresh(self):
+        errors = {}
+        started = time.perf_counter()
+        try:
+            if self._client is None:
+                self._client = self.open_client()
+            spreadsheet = self._client.open_by_key(self.key)
+            by_title = {ws.title: ws for ws in spreadsheet.worksheets()}
+            targets = []
+            for worksheet in self.worksheets:
+                if worksheet is None:
+                    title = next(iter(by_title), None)
+                else:
+                    title = worksheet if worksheet in by_title else None
+                if title is None:
+                    errors[source_label(self.key, worksheet)] = LookupError(f'找不到工作表 {worksheet}')
+                    continue
+                loader = self.loaders[worksheet]
+                targets.append((worksheet, title, loader, loader.tail_ranges()))
+
+            # 一次批量读取：已加载过的读表头 + 尾部，未加载过的读整张工作表
+            ranges = []
+            for _, title, _, tail in targets:
+                ranges.extend([a1_range(title, cells) for cells in tail] if tail else [a1_range(title)])
+            values = []
+            if ranges:
+                response = spreadsheet.values_batch_get(ranges)
+                values = [value_range.get('values', []) for value_range in response.get('valueRanges', [])]
+        except Exception as e:
+            for worksheet in self.worksheets:
+                errors.setdefault(source_label(self.key, worksheet), e)
+            return errors, 0, time.perf_counter() - started, 0.0
+        fetch_seconds = time.perf_counter() - started
+
+        def fetch_full(title):
+            return spreadsheet.values_get(a1_range(title)).get('values', [])
+
+        started = time.perf_counter()
+        position, succeeded = 0, 0
+        for worksheet, title, loader, tail in targets:
+            taken = 2 if tail else 1
+            fetched = values[position:position + taken]
+            position += taken
+            try:
+                if tail:
+                    # 增量校验不通过时再单独读取整张工作表
+                    loader.refresh_with(lambda _ranges, fetched=fetched: fetched,
+                                        lambda title=title: fetch_full(title))
+                else:
+                    loader.refresh_with(None, lambda fetched=fetched: fetched[0])
+                succeeded += 1
+            except Exception as e:
+                errors[source_label(self.key, worksheet)] = e
+        return errors, succeeded, fetch_seconds, time.perf_counter() - started
+
+
+def file_digest(path, block_size=1 << 20):
+    """文件内容的哈希 (用作本地文件的数据版本)"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _iter_xlsx_chunks(path, chunk_rows):
+    """按块读取 xlsx 第一个工作表 (只读模式流式读取，所有值转成字符串，和 Sheets 读出来的一样)"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [('' if value is None else str(value)) for value in next(rows, ())]
+        chunk = []
+        for row in rows:
+            chunk.append(['' if value is None else str(value) for value in row[:len(header)]])
+            if len(chunk) >= chunk_rows:
+                yield pd.DataFrame(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
+
+
+def read_export_file(path, chunk_rows=100_000):
+    """分块读取一个 CSV / XLSX 导出文件，每块按 clean_data 清洗后合并
+
+    原始字符串同一时间只保留一块，大文件的峰值内存取决于 chunk_rows 而不是文件大小。
+    """
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        chunks = _iter_xlsx_chunks(path, chunk_rows)
+    else:
+        chunks = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig', chunksize=chunk_rows)
+    frames = [clean_data(chunk) for chunk in chunks]
+    if not frames:
+        return pd.DataFrame()
+    df = concat_frames(frames).reset_index(drop=True)
+    return df.sort_values('Date', ascending=True, kind='stable')
+
+
+class LocalFileSource:
+    """本地 CSV / XLSX 导出文件 (如从机器人平台导出的历史数据)
+
+    patterns 为文件路径或通配符列表。每个文件是一个部分，以文件内容哈希作为数据版本，
+    内容未变化的文件不会重新解析；需要解析多个文件时在最多 max_workers 个进程中并行。
+    指定 archive_dir 时每个文件各有一个冷存档，内存中只保留近期月份。
+    _files 的更新 (刷新、存档) 和读取 (视图、历史) 在 _lock 下进行。
+    """
+
+    def __init__(self, patterns, chunk_rows=100_000, max_workers=None, name='本地文件',
+                 archive_dir=None, cold_cache=None):
+        self.patterns = [patterns] if isinstance(patterns, str) else list(patterns)
+        self.chunk_rows = chunk_rows
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.name = name
+        self.archive_dir = archive_dir
+        self.cold_cache = cold_cache
+        self._files = {}     # 路径 -> (文件状态, 内容哈希, DataFrame)
+        self._archives = {}  # 路径 -> MonthArchive
+        self._reparsed = set()  # 重新解析过、冷数据尚未整体写入存档的文件
+        self.cutoff_day = None  # 冷存档的分界日序号 (archive_before() 设置)
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return bool(self._files)
+
+    def load_snapshot(self):
+        # 文件本身就在本地，不需要快照
+        return False
+
+    def frames(self):
+        with self._lock:
+            return [(f'{self.name}/{os.path.basename(path)}', digest, df)
+                    for path, (_, digest, df) in sorted(self._files.items())]
+
+    def _paths(self):
+        paths = set()
+        for pattern in self.patterns:
+            paths.update(glob.glob(os.path.expanduser(pattern)))
+        return sorted(paths)
+
+    def refresh(self):
+        errors = {}
+        started = time.perf_counter()
+        paths = self._paths()
+        if not paths:
+            errors[self.name] = FileNotFoundError(f'没有匹配的文件: {", ".join(self.patterns)}')
+
+        # 大小和修改时间都没变的文件直接跳过；变了的再比较内容哈希
+        # (只有刷新线程修改 _files，这里不加锁读取；修改统一在最后加锁进行)
+        touched, pending = {}, {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature = (stat.st_size, stat.st_mtime_ns)
+                cached = self._files.get(path)
+                if cached and cached[0] == signature:
+                    continue
+                digest = file_digest(path)
+                if cached and cached[1] == digest:
+                    touched[path] = (signature, digest, cached[2])
+                    continue
+                pending[path] = (signature, digest)
+            except OSError as e:
+                errors[f'{self.name}/{os.path.basename(path)}'] = e
+        fetch_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        parsed = self._parse(list(pending))
+        with self._lock:
+            for path in set(self._files) - set(paths):
+                del self._files[path]
+                self._archives.pop(path, None)
+                self._reparsed.discard(path)
+            self._files.update(touched)
+            for path, result in parsed.items():
+                if isinstance(result, Exception):
+                    errors[f'{self.name}/{os.path.basename(path)}'] = result
+                else:
+                    self._files[path] = (*pending[path], result)
+                    self._reparsed.add(path)
+            # 新解析的文件先按已有的分界移走冷数据再发布，df 与存档不会重叠
+            self._archive_cold()
+        succeeded = len([path for path in paths if path in self._files])
+        return errors, succeeded, fetch_seconds, time.perf_counter() - started
+
+    def _archive(self, path):
+        if self.archive_dir is None:
+            return None
+        if path not in self._archives:
+            name = re.sub(r'[^\w.-]', '_', os.path.basename(path))
+            tag = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+            self._archives[path] = MonthArchive(os.path.join(self.archive_dir, f'{name}-{tag}'), self.cold_cache)
+        return self._archives[path]
+
+    def archive_before(self, cutoff_day):
+        with self._lock:
+            self.cutoff_day = cutoff_day
+            self._archive_cold()
+
+    def _archive_cold(self):
+        """按 cutoff_day 把各文件较早的行移入冷存档 (调用方持有 _lock)"""
+        if self.cutoff_day is None:
+            return
+        for path, (signature, digest, df) in list(self._files.items()):
+            archive = self._archive(path)
+            if archive is None:
+                continue
+            replace = path in self._reparsed
+            self._files[path] = (signature, digest, archive_cold_rows(df, archive, self.cutoff_day, replace=replace))
+            self._reparsed.discard(path)
+
+    def view(self):
+        with self._lock:
+            return [frame_view(df, self._archive(path)) for path, (_, _, df) in sorted(self._files.items())]
+
+    def history(self):
+        with self._lock:
+            return [history_of(df, self._archive(path)) for path, (_, _, df) in self._files.items()]
+
+    def _parse(self, paths):
+        """解析文件，返回 {路径: DataFrame 或异常}"""
+        results = {}
+        if len(paths) <= 1 or self.max_workers <= 1:
+            for path in paths:
+                try:
+                    results[path] = read_export_file(path, self.chunk_rows)
+                except Exception as e:
+                    results[path] = e
+            return results
+
+        # 刷新在后台线程中进行，用 spawn 启动子进程，避免在多线程进程里 fork
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(paths)), mp_context=context) as pool:
+            futures = {path: pool.submit(read_export_file, path, self.chunk_rows) for path in paths}
+            for path, future in futures.items():
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    results[path] = e
+        return results
+
+
+def build_sources(config, open_client=None, snapshot_dir=None, cold_cache=None):
+    """按配置创建数据来源
+
+    config 为 dict 列表：{'type': 'sheets', 'key': ..., 'worksheets': [...]} 或
+    {'type': 'files', 'paths': [...], 'chunk_rows': ...}；type 省略时为 sheets。
+    snapshot_dir 下存放快照和冷存档，cold_cache 为各冷存档共用的已加载月份缓存。
+    """
+    archive_dir = os.path.join(snapshot_dir, 'partitions', 'files') if snapshot_dir else None
+    sources = []
+    for item in config:
+        kind = item.get('type', 'sheets')
+        if kind == 'sheets':
+            sources.append(GoogleSheetsSource(item['key'], open_client, item.get('worksheets'), snapshot_dir, cold_cache))
+        elif kind == 'files':
+            sources.append(LocalFileSource(item['paths'], chunk_rows=item.get('chunk_rows', 100_000),
+                                           max_workers=item.get('max_workers'), name=item.get('name', '本地文件'),
+                                           archive_dir=archive_dir, cold_cache=cold_cache))
+        else:
+            raise ValueError(f'未知的数据来源类型: {kind}')
+    return sources
@@ -0,0 +1,160 @@
+"""IncrementalSheetLoader 增量加载测试 (用内存中的工作表代替 gspread)"""
+import re
+
+import pandas as pd
+import pytest
+
+from data_loader import IncrementalSheetLoader
+
+HEADER = ['日期', '机器人用户名', '机器人备注名', '绑定的产品', '所属小组', '咨询数', '新增客户线索数']
+
+
+def make_row(day, bot, consultations=5, leads=1):
+    return [f'2026-10-{day:02d}', f'{bot}_user', bot, 'P1', '项目一组', str(consultations), str(leads)]
+
+
+class MemoryWorksheet:
+    """内存中的工作表：和 Sheets API 一样省略行尾的空单元格，并记录读取方式"""
+
+    def __init__(self, values):
+        self.values = [list(row) for row in values]
+        self.full_reads = 0
+        self.tail_reads = 0
+
+    @staticmethod
+    def _trim(row):
+        row = list(row)
+        while row and row[-1] == '':
+            row.pop()
+        return row
+
+    def get_all_values(self):
+        self.full_reads += 1
+        return [self._trim(row) for row in self.values]
+
+    def batch_get(self, ranges):
+        self.tail_reads += 1
+        result = []
+        for cells in ranges:
+            first, last = re.fullmatch(r'[A-Z]*(\d+):[A-Z]*(\d*)', cells).groups()
+            rows = self.values[int(first) - 1:int(last) if last else len(self.values)]
+            result.append([self._trim(row) for row in rows])
+        return result
+
+
+def fresh_load(values):
+    """同样内容全量加载一次的结果，用来对比增量加载"""
+    _, df = IncrementalSheetLoader().refresh(MemoryWorksheet(values))
+    return df
+
+
+def assert_same_rows(df, expected):
+    pd.testing.assert_frame_equal(df.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+@pytest.fixture
+def values():
+    return [HEADER] + [make_row(day, bot) for day in range(1, 6) for bot in ('bot1', 'bot2')]
+
+
+def test_initial_load_reads_whole_sheet(values):
+    worksheet = MemoryWorksheet(values)
+    loader = IncrementalSheetLoader()
+    version, df = loader.refresh(worksheet)
+
+    assert worksheet.full_reads == 1 and worksheet.tail_reads == 0
+    assert loader.full_reloads == 1
+    assert loader.ingested_rows == 10
+    assert version and version == loader.data_version
+    assert len(df) == 10
+    assert df['Consultations'].sum() == 50
+
+
+def test_appended_rows_are_read_incrementally(values):
+    worksheet = MemoryWorksheet(values)
+    loader = IncrementalSheetLoader()
+    first_version, _ = loader.refresh(worksheet)
+
+    # 没有新行：只读尾部，版本不变
+    version, _ = loader.refresh(worksheet)
+    assert version == first_version
+    assert worksheet.full_reads == 1 and worksheet.tail_reads == 1
+
+    worksheet.values += [make_row(6, 'bot1', 7), make_row(6, 'bot3', 9, 2)]
+    version, df = loader.refresh(worksheet)
+
+    assert version != first_version
+    assert worksheet.full_reads == 1 and worksheet.tail_reads == 2
+    assert loader.full_reloads == 1
+    assert loader.ingested_rows == 12
+    assert_same_rows(df, fresh_load(worksheet.values))
+
+
+def test_shrunk_sheet_falls_back_to_full_reload(values):
+    worksheet = MemoryWorksheet(values)
+    loader = IncrementalSheetLoader()
+    loader.refresh(worksheet)
+
+    del worksheet.values[-3:]
+    _, df = loader.refresh(worksheet)
+
+    assert loader.full_reloads == 2
+    assert loader.ingested_rows == 7
+    assert_same_rows(df, fresh_load(worksheet.values))
+
+
+def test_header_change_falls_back_to_full_reload(values):
+    worksheet = MemoryWorksheet(values)
+    loader = IncrementalSheetLoader()
+    loader.refresh(worksheet)
+
+    worksheet.values = [HEADER + ['备注']] + [row + ['x'] for row in worksheet.values[1:]]
+    worksheet.values.append(make_row(6, 'bot1') + ['y'])
+    _, df = loader.refresh(worksheet)
+
+    assert loader.full_reloads == 2
+    assert loader.header == HEADER + ['备注']
+    assert len(df) == 11
+
+
+def test_edited_last_row_falls_back_to_full_reload(values):
+    worksheet = MemoryWorksheet(values)
+    loader = IncrementalSheetLoader()
+    first_version, _ = loader.refresh(worksheet)
+
+    worksheet.values[-1] = make_row(5, 'bot2', consultations=40)
+    version, df = loader.refresh(worksheet)
+
+    assert loader.full_reloads == 2
+    assert version != first_version
+    assert df['Consultations'].iloc[-1] == 40
+    assert_same_rows(df, fresh_load(worksheet.values))
+
+
+def test_snapshot_resumes_incremental_loading(values, tmp_path):
+    snapshot_path = str(tmp_path / 'sheet.arrow')
+    worksheet = MemoryWorksheet(values)
+    loader = IncrementalSheetLoader(snapshot_path=snapshot_path)
+    version, df = loader.refresh(worksheet)
+
+    restored = IncrementalSheetLoader(snapshot_path=snapshot_path)
+    assert restored.load_snapshot()
+    assert restored.from_snapshot
+    assert restored.data_version == version
+    assert restored.ingested_rows == loader.ingested_rows
+    assert_same_rows(restored.df, df)
+
+    # 重启后直接从快照记录的位置继续增量加载
+    worksheet.values.append(make_row(6, 'bot1'))
+    _, df = restored.refresh(worksheet)
+    assert restored.full_reloads == 0
+    assert not restored.from_snapshot
+    assert worksheet.full_reads == 1
+    assert_same_rows(df, fresh_load(worksheet.values))
+
+
+def test_missing_or_corrupt_snapshot_is_ignored(tmp_path):
+    snapshot_path = tmp_path / 'sheet.arrow'
+    assert not IncrementalSheetLoader(snapshot_path=str(snapshot_path)).load_snapshot()
+    snapshot_path.write_bytes(b'not an arrow file')
+    assert not IncrementalSheetLoader(snapshot_path=str(snapshot_path)).load_snapshot()
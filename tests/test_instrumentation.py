@@ -0,0 +1,54 @@
+"""PerfRecorder 测试"""
+import pytest
+
+import instrumentation
+from instrumentation import PerfRecorder
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sections_are_timed_in_order(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(instrumentation.time, 'perf_counter', clock)
+    perf = PerfRecorder()
+    run_id = perf.start_run()
+
+    perf.begin('load_data', rows=10)
+    clock.now += 0.5
+    perf.begin('4. 核心数据指标')
+    perf.cache_lookup(hit=True)
+    clock.now += 0.25
+    perf.end()
+
+    records = perf.run_records()
+    assert [record['section'] for record in records] == ['load_data', '4. 核心数据指标']
+    assert [record['seconds'] for record in records] == pytest.approx([0.5, 0.25])
+    assert all(record['run'] == run_id for record in records)
+    assert records[1]['cache_hits'] == 1
+
+
+def test_interrupted_section_is_not_recorded(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(instrumentation.time, 'perf_counter', clock)
+    perf = PerfRecorder()
+    perf.start_run()
+    perf.begin('load_data')
+    clock.now += 0.1
+    perf.end()
+
+    # 被 st.stop() 打断：板块开始后没有 end()，下一次运行在很久之后才开始
+    perf.begin('7. 各小组核心数据指标')
+    clock.now += 30.0
+    perf.start_run()
+    perf.begin('load_data')
+    clock.now += 0.2
+    perf.end()
+
+    assert [record['section'] for record in perf.records] == ['load_data', 'load_data']
+    assert [record['seconds'] for record in perf.records] == pytest.approx([0.1, 0.2])
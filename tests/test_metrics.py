@@ -0,0 +1,294 @@
+"""指标计算测试：前缀和、向量化对比等实现与直接 groupby 的结果对照"""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_raw_frame
+from data_loader import clean_data
+from metrics import (
+    HIERARCHY_LEVELS, METRICS, MISSING_LABEL, HierarchyRollup, RangeSums, build_leaderboard, build_rollup_cube,
+    calculate_group_metrics_table, compare_children, compare_periods, reporting_periods,
+)
+
+TODAY = datetime.date(2026, 10, 15)
+PERIODS = reporting_periods(TODAY)
+
+
+@pytest.fixture(scope='module')
+def df():
+    """8 个机器人 40 天 (2026-09-06 ~ 10-15) 的清洗后数据，带几种边界情况"""
+    raw = make_raw_frame(8 * 40, n_bots=8, n_groups=3, n_products=2, seed=2)
+    raw = raw[raw['日期'] != '2026-10-08']  # 没有任何数据的一天
+    # bot00007 本周才开始有数据 (上一周期为 0)
+    raw = raw[(raw['机器人备注名'] != 'bot00007') | (raw['日期'] >= '2026-10-12')]
+    # bot00006 最近两周咨询数都为 0
+    recent = (raw['机器人备注名'] == 'bot00006') & (raw['日期'] >= '2026-10-05')
+    raw.loc[recent, '咨询数'] = '0'
+    df = clean_data(raw.reset_index(drop=True))
+    df.loc[df['BotNoteName'] == 'bot00003', 'Group'] = np.nan  # 未填写小组
+    return df
+
+
+@pytest.fixture(scope='module')
+def cube(df):
+    return build_rollup_cube(df)
+
+
+def in_range(df, start, end):
+    dates = df['Date'].dt.date
+    return df[(dates >= start) & (dates <= end)]
+
+
+def reference_totals(df, start, end, by):
+    """直接 groupby 的区间合计 (维度为空的行不计入)"""
+    return in_range(df, start, end).groupby(by, observed=True)[METRICS].sum()
+
+
+# 多天、单日、没有数据的一天、数据开始之前、跨过数据开始日、end 早于 start
+RANGES = [
+    (datetime.date(2026, 9, 1), TODAY),
+    (datetime.date(2026, 10, 5), datetime.date(2026, 10, 11)),
+    (TODAY, TODAY),
+    (datetime.date(2026, 10, 8), datetime.date(2026, 10, 8)),
+    (datetime.date(2026, 8, 1), datetime.date(2026, 8, 31)),
+    (datetime.date(2026, 9, 1), datetime.date(2026, 9, 6)),
+    (datetime.date(2026, 10, 12), datetime.date(2026, 10, 11)),
+]
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+def test_range_sums_match_groupby(df, cube, start, end):
+    range_sums = RangeSums(cube)
+    expected = in_range(df, start, end)[METRICS].sum().to_numpy()
+    np.testing.assert_allclose(range_sums.total(start, end), expected)
+
+    by_group = RangeSums(cube, 'Group')
+    expected = reference_totals(df, start, end, 'Group').reindex(by_group.scopes, fill_value=0)
+    np.testing.assert_allclose(by_group.totals(start, end), expected.to_numpy())
+    for group in by_group.scopes:
+        np.testing.assert_allclose(by_group.total(start, end, group), expected.loc[group].to_numpy())
+    np.testing.assert_allclose(by_group.total(start, end, '不存在的小组'), [0, 0])
+
+
+def test_group_metrics_table_matches_per_group_loop(df, cube):
+    table = calculate_group_metrics_table(RangeSums(cube, 'Group'), PERIODS)
+
+    groups = sorted(df['Group'].dropna().unique())
+    assert list(table.index) == groups
+    for group in groups:
+        rows = df[df['Group'] == group]
+        sums = {name: in_range(rows, start, end)[METRICS].sum() for name, (start, end) in PERIODS.items()}
+        days = {name: (end - start).days + 1 for name, (start, end) in PERIODS.items()}
+        for suffix, metric in (('c', 'Consultations'), ('l', 'Leads')):
+            row = table.loc[group]
+            assert row[f'tm_{suffix}'] == sums['this_month'][metric]
+            assert row[f'tw_{suffix}'] == sums['this_week'][metric]
+            assert row[f't_{suffix}'] == sums['today'][metric]
+            assert row[f'delta_day_{suffix}'] == sums['today'][metric] - sums['yesterday'][metric]
+            assert row[f'delta_month_{suffix}'] == pytest.approx(
+                sums['this_month'][metric] / days['this_month'] - sums['last_month'][metric] / days['last_month'])
+            assert row[f'delta_week_{suffix}'] == pytest.approx(
+                sums['this_week'][metric] / days['this_week'] - sums['last_week'][metric] / days['last_week'])
+
+
+def test_group_metrics_table_single_day_and_empty_periods(df, cube):
+    # 所有区间都是同一天，或者都在数据开始之前
+    for day in (TODAY, datetime.date(2026, 8, 1)):
+        periods = {name: (day, day) for name in PERIODS}
+        table = calculate_group_metrics_table(RangeSums(cube, 'Group'), periods)
+        expected = reference_totals(df, day, day, 'Group').reindex(table.index, fill_value=0)
+        assert (table['t_c'] == expected['Consultations']).all()
+        assert (table['t_l'] == expected['Leads']).all()
+        assert (table[['delta_month_c', 'delta_week_c', 'delta_day_c', 'delta_day_l']] == 0).all().all()
+
+
+def reference_compare(df, dims, current, previous):
+    """逐行计算的对比表 (与改写前的 groupby + apply 实现相同)"""
+    curr = reference_totals(df, *current, dims).add_prefix('Curr_')
+    prev = reference_totals(df, *previous, dims).add_prefix('Prev_')
+    compare = curr.join(prev, how='outer').fillna(0).astype(np.float64).reset_index()
+    curr_days = (current[1] - current[0]).days + 1
+    prev_days = (previous[1] - previous[0]).days + 1
+    for m in METRICS:
+        compare[f'Curr_Avg_{m}'] = compare[f'Curr_{m}'] / curr_days
+        compare[f'Prev_Avg_{m}'] = compare[f'Prev_{m}'] / prev_days
+        compare[f'Diff_Avg_{m}'] = compare[f'Curr_Avg_{m}'] - compare[f'Prev_Avg_{m}']
+
+        def pct_change(row, m=m):
+            if row[f'Prev_Avg_{m}'] == 0:
+                return 100.0 if row[f'Curr_Avg_{m}'] > 0 else 0.0
+            return (row[f'Curr_Avg_{m}'] - row[f'Prev_Avg_{m}']) / row[f'Prev_Avg_{m}'] * 100
+
+        compare[f'Pct_Change_{m}'] = compare.apply(pct_change, axis=1) if len(compare) else 0.0
+    return compare
+
+
+def assert_same_compare(compare, expected, dims):
+    compare = compare.astype({col: str for col in dims}).reset_index(drop=True)
+    expected = expected.astype({col: str for col in dims})[list(compare.columns)]
+    pd.testing.assert_frame_equal(compare, expected, check_dtype=False)
+
+
+# 本周 vs 上周 (有上期为 0 的机器人)、今日 vs 昨日、上期在数据开始之前、本期是没有数据的一天
+COMPARISONS = [
+    (PERIODS['this_week'], PERIODS['last_week']),
+    (PERIODS['today'], PERIODS['yesterday']),
+    ((datetime.date(2026, 9, 6), datetime.date(2026, 9, 12)), (datetime.date(2026, 8, 1), datetime.date(2026, 8, 31))),
+    ((datetime.date(2026, 10, 8), datetime.date(2026, 10, 8)), (datetime.date(2026, 10, 7), datetime.date(2026, 10, 7))),
+]
+
+
+@pytest.mark.parametrize('current, previous', COMPARISONS)
+@pytest.mark.parametrize('dims', [['Product'], ['Group', 'BotNoteName']])
+def test_compare_periods_matches_groupby(df, cube, dims, current, previous):
+    compare = compare_periods(cube, dims, current, previous)
+    assert_same_compare(compare, reference_compare(df, dims, current, previous), dims)
+
+
+def test_compare_periods_zero_previous_pct(cube):
+    compare = compare_periods(cube, 'BotNoteName', PERIODS['this_week'], PERIODS['last_week']).set_index('BotNoteName')
+    # 上期为 0：本期有数据记 100%，两期都为 0 记 0%
+    assert compare.loc['bot00007', 'Prev_Consultations'] == 0
+    assert compare.loc['bot00007', 'Pct_Change_Consultations'] == 100.0
+    assert compare.loc['bot00006', ['Curr_Consultations', 'Prev_Consultations']].tolist() == [0, 0]
+    assert compare.loc['bot00006', 'Pct_Change_Consultations'] == 0.0
+
+
+def test_compare_periods_with_no_rows(cube):
+    empty = (datetime.date(2026, 8, 1), datetime.date(2026, 8, 7))
+    compare = compare_periods(cube, ['Group', 'BotNoteName'], empty, empty)
+    assert compare.empty
+    assert {f'Pct_Change_{m}' for m in METRICS} <= set(compare.columns)
+
+
+@pytest.fixture(scope='module')
+def labelled(df):
+    """维度为空时填上 MISSING_LABEL 的原始数据，与分层汇总的节点对应"""
+    dims = HIERARCHY_LEVELS[-1]
+    return df.assign(**{col: df[col].astype(object).where(df[col].notna(), MISSING_LABEL) for col in dims})
+
+
+def hierarchy_paths(labelled):
+    """全部节点：全部、各产品、各小组 (含未填写的小组) 和各 Bot"""
+    paths = [()]
+    for cols in HIERARCHY_LEVELS[1:]:
+        paths += sorted(labelled[cols].drop_duplicates().itertuples(index=False, name=None))
+    return paths
+
+
+def under(labelled, path):
+    cols = HIERARCHY_LEVELS[-1][:len(path)]
+    mask = np.ones(len(labelled), dtype=bool)
+    for col, label in zip(cols, path):
+        mask &= (labelled[col] == label).to_numpy()
+    return labelled[mask]
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+def test_hierarchy_totals_and_children_match_groupby(labelled, cube, start, end):
+    hierarchy = HierarchyRollup(cube)
+    assert any(MISSING_LABEL in path for path in hierarchy_paths(labelled))
+    for path in hierarchy_paths(labelled):
+        rows = under(labelled, path)
+        assert HIERARCHY_LEVELS[hierarchy.level(path)] == HIERARCHY_LEVELS[-1][:len(path)]
+        np.testing.assert_array_equal(hierarchy.total(path, start, end),
+                                      in_range(rows, start, end)[METRICS].sum().to_numpy())
+        if hierarchy.is_leaf(path):
+            continue
+
+        # 子节点包括该区间内没有数据的 (合计为 0)
+        cols = HIERARCHY_LEVELS[hierarchy.level(path) + 1]
+        children = hierarchy.children(path, start, end).set_index(cols).sort_index()
+        expected = (in_range(rows, start, end).groupby(cols)[METRICS].sum()
+                    .reindex(rows[cols].drop_duplicates().set_index(cols).index, fill_value=0).sort_index())
+        pd.testing.assert_frame_equal(children, expected, check_dtype=False, check_index_type=False)
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+def test_hierarchy_daily_matches_groupby(labelled, cube, start, end):
+    hierarchy = HierarchyRollup(cube)
+    for path in hierarchy_paths(labelled)[:6]:
+        expected = in_range(under(labelled, path), start, end).groupby('Date')[METRICS].sum().reset_index()
+        pd.testing.assert_frame_equal(hierarchy.daily(path, start, end), expected, check_dtype=False)
+
+
+def test_hierarchy_unknown_node(cube):
+    hierarchy = HierarchyRollup(cube)
+    assert hierarchy.level(('不存在的产品',)) is None
+    assert hierarchy.level(('产品00000', '小组00000', 'bot')) is None
+
+
+@pytest.mark.parametrize('current, previous', COMPARISONS)
+def test_compare_children_matches_compare_periods(labelled, cube, current, previous):
+    hierarchy = HierarchyRollup(cube)
+    for path in hierarchy_paths(labelled):
+        if hierarchy.is_leaf(path):
+            continue
+        cols = HIERARCHY_LEVELS[hierarchy.level(path) + 1]
+        expected = reference_compare(under(labelled, path), cols, current, previous)
+        # 两期合计都为 0 的子节点不出现
+        totals = expected[[f'{prefix}_{m}' for prefix in ('Curr', 'Prev') for m in METRICS]]
+        expected = expected[(totals != 0).any(axis=1)].reset_index(drop=True)
+        compare = compare_children(hierarchy, path, current, previous)
+        compare = compare.sort_values(cols, key=lambda col: col.astype(str)).reset_index(drop=True)
+        expected = expected.sort_values(cols, key=lambda col: col.astype(str)).reset_index(drop=True)
+        assert_same_compare(compare, expected, cols)
+
+
+def reference_leaderboard(compare, metric, k, by, scope):
+    """逐个 scope 用 nlargest / nsmallest 取前 k 名 (名次相同时取靠前的行)"""
+    value_col = f'Pct_Change_{metric}' if by == 'pct' else f'Diff_Avg_{metric}'
+    diff_col = f'Diff_Avg_{metric}'
+    if scope is None:
+        scopes = [compare]
+    else:
+        scopes = [compare[compare[scope] == value] for value in sorted(compare[scope].dropna().unique())]
+    boards = []
+    for rows in scopes:
+        for direction, top in (('up', rows[rows[diff_col] > 0].nlargest(k, value_col, keep='first')),
+                               ('down', rows[rows[diff_col] < 0].nsmallest(k, value_col, keep='first'))):
+            boards.append(top.assign(Direction=direction, Rank=np.arange(1, len(top) + 1)))
+    board = pd.concat(boards, ignore_index=True)
+    return board[['Direction', 'Rank'] + list(compare.columns)]
+
+
+@pytest.fixture(scope='module')
+def tied_compare():
+    """有并列值、差值为 0 和小组为空的对比表"""
+    diff = [3.0, 3.0, 1.0, -2.0, -2.0, 0.0, 5.0, 3.0, -1.0, -2.0, 2.0, 0.0]
+    pct = [50.0, 50.0, 100.0, -50.0, -50.0, 0.0, 100.0, 50.0, -100.0, -50.0, 100.0, 0.0]
+    compare = pd.DataFrame({
+        'Group': ['B', 'A', 'A', 'A', 'B', 'A', 'B', 'A', 'B', 'A', None, 'B'],
+        'BotNoteName': [f'bot{i}' for i in range(len(diff))],
+        'Diff_Avg_Consultations': diff,
+        'Pct_Change_Consultations': pct,
+    })
+    compare['Group'] = compare['Group'].astype('category')
+    return compare
+
+
+@pytest.mark.parametrize('k', [1, 2, 3, 10])
+@pytest.mark.parametrize('by', ['pct', 'abs'])
+@pytest.mark.parametrize('scope', [None, 'Group'])
+def test_leaderboard_matches_nlargest_with_ties(tied_compare, k, by, scope):
+    board = build_leaderboard(tied_compare, 'Consultations', k=k, by=by, scope=scope)
+    expected = reference_leaderboard(tied_compare, 'Consultations', k, by, scope)
+    pd.testing.assert_frame_equal(board, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('metric', METRICS)
+@pytest.mark.parametrize('k', [1, 3, 10])
+def test_leaderboard_per_group_matches_nlargest(cube, metric, k):
+    compare = compare_periods(cube, ['Group', 'BotNoteName'], PERIODS['this_week'], PERIODS['last_week'])
+    for by in ('pct', 'abs'):
+        board = build_leaderboard(compare, metric, k=k, by=by, scope='Group')
+        expected = reference_leaderboard(compare, metric, k, by, 'Group')
+        pd.testing.assert_frame_equal(board, expected, check_dtype=False)
+
+
+def test_leaderboard_of_empty_compare(tied_compare):
+    board = build_leaderboard(tied_compare.iloc[:0], 'Consultations', scope='Group')
+    assert board.empty
+    assert list(board.columns) == ['Direction', 'Rank'] + list(tied_compare.columns)
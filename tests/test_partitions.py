@@ -0,0 +1,127 @@
+"""按月分区存档测试：近期月份在内存、较早月份在临时目录的 Parquet 中"""
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_raw_frame
+from data_loader import MultiSourceLoader, archive_cold_rows, clean_data, rows_in_range
+from metrics import daily_trend, filter_rows
+from partitions import MonthArchive, hot_cutoff_day
+from sources import LocalFileSource
+
+HOT_MONTHS = 2
+# 150 天 (2026-05-19 ~ 2026-10-15)，每天 8 个机器人
+START, END = datetime.date(2026, 5, 19), datetime.date(2026, 10, 15)
+
+
+def raw_frame(n_days=150, seed=0):
+    return make_raw_frame(8 * n_days, n_bots=8, n_groups=3, n_products=2, seed=seed)
+
+
+def plain(frame):
+    """去掉分类类型和索引，便于与未分区的数据比较"""
+    frame = frame.reset_index(drop=True)
+    return frame.astype({col: str for col in frame.columns if isinstance(frame[col].dtype, pd.CategoricalDtype)})
+
+
+def assert_same_rows(frame, expected):
+    pd.testing.assert_frame_equal(plain(frame), plain(expected))
+
+
+def make_loader(tmp_path, raw):
+    path = tmp_path / 'export.csv'
+    raw.to_csv(path, index=False)
+    source = LocalFileSource([str(path)], max_workers=1, archive_dir=str(tmp_path / 'partitions'))
+    return MultiSourceLoader([source], hot_months=HOT_MONTHS), path
+
+
+def cold_day(df):
+    return hot_cutoff_day(int(df['Day'].iloc[-1]), HOT_MONTHS)
+
+
+@pytest.fixture
+def full():
+    return clean_data(raw_frame())
+
+
+def test_range_across_hot_months_matches_unpartitioned(tmp_path, full):
+    loader, _ = make_loader(tmp_path, raw_frame())
+    loader.refresh()
+    view = loader.view()
+
+    assert loader.hot_from == cold_day(full)
+    assert int(loader.df['Day'].iloc[0]) >= loader.hot_from
+    assert len(loader.df) < len(full)
+
+    # 跨越冷热分界的区间、只在冷存档中的区间、单日区间
+    for start, end in [(START, END), (datetime.date(2026, 6, 10), datetime.date(2026, 9, 20)),
+                       (datetime.date(2026, 7, 1), datetime.date(2026, 7, 31)),
+                       (datetime.date(2026, 8, 31), datetime.date(2026, 8, 31))]:
+        rows = loader.load_range(start, end, view)
+        assert_same_rows(filter_rows(rows, start, end), filter_rows(full, start, end))
+        notenames = ['bot00001', 'bot00005']
+        pd.testing.assert_frame_equal(daily_trend(rows, start, end, notenames),
+                                      daily_trend(full, start, end, notenames))
+
+
+def test_view_is_not_affected_by_later_refresh(tmp_path, full):
+    raw = raw_frame()
+    loader, path = make_loader(tmp_path, raw.iloc[:-8 * 20])  # 先只到 9 月下旬
+    loader.refresh()
+    view = loader.view()
+    before = loader.load_range(START, END, view)
+
+    # 之后的刷新把 8 月移入冷存档；旧视图读到的行既不重复也不缺少
+    raw.to_csv(path, index=False)
+    loader.refresh()
+    assert loader.hot_from > int(view[0][0]['Day'].iloc[0])
+    assert_same_rows(loader.load_range(START, END, view), before)
+    assert_same_rows(loader.load_range(START, END), full)
+
+
+def test_full_reload_replaces_archived_months(tmp_path):
+    archive = MonthArchive(str(tmp_path / 'archive'))
+    old = clean_data(raw_frame())
+    hot = archive_cold_rows(old, archive, cold_day(old), replace=True)
+    months = archive.months()
+    assert months == ['2026-05', '2026-06', '2026-07', '2026-08']
+
+    # 全量重新加载：数值被改动、5 月的行被删掉
+    raw = raw_frame(seed=1)
+    new = clean_data(raw[raw['日期'] >= '2026-06-01'].reset_index(drop=True))
+    hot = archive_cold_rows(new, archive, cold_day(new), replace=True)
+
+    assert archive.months() == ['2026-06', '2026-07', '2026-08']
+    assert not os.path.exists(os.path.join(archive.directory, '2026-05.parquet'))
+    cold = archive.load_range(0, 10 ** 6)
+    assert_same_rows(cold, new[new['Day'] < cold_day(new)])
+    assert sum(info['rows'] for info in archive.manifest.values()) == len(cold)
+    assert_same_rows(pd.concat([cold, hot]), new)
+
+
+def test_incremental_store_merges_into_existing_month(tmp_path, full):
+    archive = MonthArchive(str(tmp_path / 'archive'))
+    july = full[(full['Date'] >= '2026-07-01') & (full['Date'] < '2026-08-01')]
+    archive.store(july.iloc[:40])
+    archive.store(july.iloc[40:])
+    assert archive.months() == ['2026-07']
+    assert_same_rows(archive.load_range(0, 10 ** 6), july)
+
+
+def test_manifest_survives_reopening(tmp_path, full):
+    directory = str(tmp_path / 'archive')
+    archive = MonthArchive(directory)
+    hot = archive_cold_rows(full, archive, cold_day(full), replace=True)
+
+    reopened = MonthArchive(directory)
+    assert reopened.manifest == archive.manifest
+    assert reopened.min_day() == int(full['Day'].iloc[0])
+    assert reopened.notenames() == set(full['BotNoteName'].astype(str))
+    parts = rows_in_range(hot, reopened, int(full['Day'].iloc[0]), int(full['Day'].iloc[-1]))
+    assert_same_rows(pd.concat(parts), full)
+
+    # 数据文件丢失的月份视为没有存档
+    os.remove(os.path.join(directory, '2026-06.parquet'))
+    assert '2026-06' not in MonthArchive(directory).months()
@@ -0,0 +1,52 @@
+"""QueryCache 测试"""
+import pandas as pd
+
+from query_cache import QueryCache
+
+
+def test_hits_and_lru_eviction():
+    cache = QueryCache(max_entries=2)
+    calls = []
+
+    def compute(name):
+        return lambda: calls.append(name) or name
+
+    assert cache.get_or_compute(('v1', 'a'), compute('a')) == 'a'
+    assert cache.get_or_compute(('v1', 'a'), compute('a')) == 'a'
+    cache.get_or_compute(('v1', 'b'), compute('b'))
+    cache.get_or_compute(('v1', 'a'), compute('a'))  # a 变为最近使用
+    cache.get_or_compute(('v1', 'c'), compute('c'))  # 淘汰 b
+    cache.get_or_compute(('v1', 'b'), compute('b'))
+    assert calls == ['a', 'b', 'c', 'b']
+    assert cache.stats()['evictions'] == 2
+
+
+def test_evicts_by_estimated_size():
+    frame = pd.DataFrame({'x': range(1000)})
+    cache = QueryCache(max_entries=10, max_bytes=frame.memory_usage(index=True, deep=True).sum() + 1)
+    cache.get_or_compute(('v1', 'a'), lambda: frame)
+    cache.get_or_compute(('v1', 'b'), lambda: frame.copy())
+    assert cache.stats()['entries'] == 1
+
+
+def test_retain_version_drops_other_versions():
+    cache = QueryCache()
+    cache.retain_version('v1')
+    cache.get_or_compute(('v1', 'a'), lambda: 1)
+    cache.retain_version('v2')
+    assert cache.stats()['entries'] == 0
+
+
+def test_result_finished_after_version_change_is_not_cached():
+    cache = QueryCache()
+    cache.retain_version('v1')
+
+    def slow_old_query():
+        # 计算还没结束，新的数据版本已经生效并清理了旧结果
+        cache.retain_version('v2')
+        return 'old'
+
+    assert cache.get_or_compute(('v1', 'a'), slow_old_query) == 'old'
+    assert cache.stats()['entries'] == 0
+    assert cache.get_or_compute(('v2', 'a'), lambda: 'new') == 'new'
+    assert cache.stats()['entries'] == 1
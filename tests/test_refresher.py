@@ -0,0 +1,77 @@
+"""BackgroundRefresher 测试：on_update 在新数据包生效之后、在刷新线程中调用"""
+import threading
+
+import pandas as pd
+
+from refresher import BackgroundRefresher
+
+
+class FakeLoader:
+    """按顺序返回给定数据版本的加载器；snapshot_version 不为空时表示已从本地快照恢复"""
+
+    def __init__(self, versions, snapshot_version=None):
+        self.versions = list(versions)
+        self.loaded = snapshot_version is not None
+        self.from_snapshot = self.loaded
+        self.data_version = snapshot_version or ''
+        self.df = pd.DataFrame({'Consultations': [1]}) if self.loaded else pd.DataFrame()
+        self.last_timings = {}
+
+    def refresh(self):
+        self.data_version = self.versions.pop(0)
+        self.df = pd.DataFrame({'Consultations': [len(self.data_version)]})
+        self.from_snapshot = False
+        return self.data_version, self.df
+
+
+def run_once(refresher):
+    """让刷新线程跑一轮后停下"""
+    refresher.interval = refresher.retry_interval = 0
+    refresher.stop()
+    refresher.start()
+    refresher._thread.join(5)
+
+
+def test_on_update_runs_after_swap_on_refresher_thread():
+    seen = []
+
+    def on_update(bundle):
+        seen.append((bundle['version'], refresher.current() is bundle, threading.current_thread().name))
+
+    refresher = BackgroundRefresher(FakeLoader(['v1']), build=lambda df: {}, on_update=on_update)
+    run_once(refresher)
+    assert seen == [('v1', True, 'data-refresher')]
+
+
+def test_snapshot_bundle_is_not_published_during_init():
+    seen = []
+    refresher = BackgroundRefresher(FakeLoader(['v1'], snapshot_version='v1'), build=lambda df: {},
+                                    on_update=lambda bundle: seen.append(bundle['version']))
+    assert refresher.current()['version'] == 'v1'
+    assert seen == []
+
+    # 快照与数据来源一致：该版本只发布一次
+    run_once(refresher)
+    assert seen == ['v1']
+    refresher.refresh_now()
+    refresher._notify_update()
+    assert seen == ['v1']
+
+
+def test_stale_snapshot_is_skipped_for_the_refreshed_version():
+    seen = []
+    refresher = BackgroundRefresher(FakeLoader(['v2'], snapshot_version='v1'), build=lambda df: {},
+                                    on_update=lambda bundle: seen.append(bundle['version']))
+    run_once(refresher)
+    assert seen == ['v2']
+
+
+def test_failing_on_update_keeps_new_bundle():
+    def on_update(bundle):
+        raise RuntimeError('publish failed')
+
+    refresher = BackgroundRefresher(FakeLoader(['v1']), build=lambda df: {'built': True}, on_update=on_update)
+    run_once(refresher)
+    assert refresher.current()['version'] == 'v1'
+    assert refresher.current()['built']
+    assert refresher.last_error is None